@@ -0,0 +1,182 @@
+import os
+import pandas as pd
+import streamlit as st
+from query_log import get_query_stats, get_slow_queries, reset_query_log, SLOW_QUERY_THRESHOLD_MS
+from decision_logic import get_scoring_cache_stats
+from memory_profile import (start_profiling, stop_profiling, is_profiling, reset_profiles, get_profiled_pages,
+                            get_top_allocations, get_page_history, build_memory_report)
+from ttl_cache import estimate_size
+from storage import get_storage, SQLiteBackend
+from jobs import register_job, submit_job, show_jobs_panel, get_job_metrics, STATUS_LABELS
+from catalog import get_base_catalog, reload_catalog, get_tenant_overlays
+from downloads import get_download_cache_stats
+from figure_export import get_figure_stats, reset_figure_stats, FIGURE_JSON_ENGINE
+
+# Comma-separated usernames allowed to open the administration page
+ADMIN_USERS = {u.strip() for u in os.environ.get('SELETOR_ADMIN_USERS', '').split(',') if u.strip()}
+
+# Tables admins may export from the browser; users is left out to keep password hashes server-side
+EXPORTABLE_TABLES = ['recommendations', 'feedback']
+
+ORDER_OPTIONS = {
+    'Tempo total': 'total_ms',
+    'Pior execução': 'max_ms',
+    'Execuções': 'count'
+}
+
+def is_admin(username):
+    return username in ADMIN_USERS
+
+def show_query_log():
+    """Display the slowest SQL statements and their query plans."""
+    st.header("Consultas SQL")
+    order_label = st.selectbox("Ordenar por", list(ORDER_OPTIONS))
+    stats = get_query_stats(top=20, order_by=ORDER_OPTIONS[order_label])
+    if stats:
+        stats_df = pd.DataFrame(stats)[['sql', 'count', 'total_ms', 'mean_ms', 'max_ms']]
+        stats_df.columns = ['Instrução', 'Execuções', 'Total (ms)', 'Média (ms)', 'Máximo (ms)']
+        st.dataframe(stats_df)
+    else:
+        st.info("Nenhuma consulta registrada neste processo.")
+
+    slow_queries = get_slow_queries()
+    st.subheader(f"Consultas Lentas (≥ {SLOW_QUERY_THRESHOLD_MS:g} ms)")
+    if not slow_queries:
+        st.write("Nenhuma consulta lenta registrada.")
+    for entry in slow_queries[:50]:
+        with st.expander(f"{entry['timestamp']} — {entry['ms']:.1f} ms — {entry['sql'][:80]}"):
+            st.code(entry['sql'], language='sql')
+            st.write(f"**Parâmetros:** {entry['params'] or '(nenhum)'}")
+            st.write("**Plano de execução:**")
+            st.code('\n'.join(entry['plan']) or "(sem plano)", language='text')
+            if any(line.startswith('SCAN') or 'TEMP B-TREE' in line for line in entry['plan']):
+                st.warning("Varredura completa ou ordenação temporária: considere um índice.")
+
+    if st.button("Limpar Registro de Consultas"):
+        reset_query_log()
+        st.success("Registro de consultas limpo.")
+
+def show_cache_stats():
+    st.header("Caches")
+    rows = [dict(get_scoring_cache_stats(), cache='Pontuação'),
+            dict(get_download_cache_stats(), cache='Downloads')]
+    storage = get_storage()
+    if isinstance(storage, SQLiteBackend):
+        rows.append(dict(storage.db.get_user_cache_stats(), cache='Usuários'))
+    st.dataframe(pd.DataFrame(rows).set_index('cache'))
+
+def show_catalog_status():
+    st.header("Catálogo de DLTs")
+    catalog = get_base_catalog()
+    st.write(f"Arquivo: `{catalog.path}`")
+    st.write(f"Versão {catalog.version} · hash `{catalog.content_hash}` · carregado em {catalog.loaded_at}")
+    if st.button("Recarregar Catálogo"):
+        if reload_catalog():
+            st.success(f"Catálogo carregado: hash {get_base_catalog().content_hash}.")
+        else:
+            st.error("Arquivo de catálogo inválido; a versão atual foi mantida.")
+    overlays = get_tenant_overlays()
+    if overlays:
+        st.subheader("Ajustes por Tenant")
+        overlays_df = pd.DataFrame(overlays)
+        overlays_df.columns = ['Tenant', 'Hash do Ajuste', 'Usuários']
+        st.dataframe(overlays_df)
+
+def show_figure_stats():
+    """Display the payload sent per Plotly figure before and after slimming."""
+    st.header("Gráficos")
+    stats = get_figure_stats()
+    if not stats:
+        st.info("Nenhum gráfico exibido neste processo.")
+        return
+    stats_df = pd.DataFrame(stats)
+    st.caption(f"Serializador JSON: {FIGURE_JSON_ENGINE} · redução total de "
+               f"{1 - stats_df['bytes'].sum() / stats_df['raw_bytes'].sum():.0%}")
+    stats_df.columns = ['Gráfico', 'Renderizações', 'Original (bytes)', 'Enviado (bytes)', 'Redução',
+                        'Compactação Média (ms)', 'Serialização Média (ms)']
+    st.dataframe(stats_df.style.format({'Redução': '{:.0%}'}))
+    if st.button("Limpar Estatísticas de Gráficos"):
+        reset_figure_stats()
+
+def show_memory_profile():
+    """Display per-page allocation sites recorded by the memory profiler."""
+    st.header("Memória por Página")
+    profiling = st.toggle("Perfilamento de memória (tracemalloc)", value=is_profiling(),
+                          help="Desacelera todas as alocações do processo; mantenha desligado em operação normal")
+    if profiling != is_profiling():
+        start_profiling() if profiling else stop_profiling()
+
+    pages = get_profiled_pages()
+    if not pages:
+        st.info("Nenhuma página perfilada ainda. Ative o perfilamento e navegue pelas páginas.")
+    else:
+        page = st.selectbox("Página", pages)
+        history = get_page_history(page)
+        if history:
+            history_df = pd.DataFrame(history)
+            history_df.columns = ['Momento', 'Memória Rastreada (KB)', 'Pico (KB)', 'Retido na Renderização (KB)']
+            st.line_chart(history_df.set_index('Momento')[['Memória Rastreada (KB)']])
+        allocations = get_top_allocations(page)
+        if allocations:
+            allocations_df = pd.DataFrame(allocations)
+            allocations_df.columns = ['Local de Alocação', 'Retido (KB)', 'Blocos', 'Por Renderização (KB)']
+            st.dataframe(allocations_df)
+        st.download_button("Baixar Relatório de Memória", build_memory_report(),
+                           "relatorio_memoria.txt", "text/plain")
+        if st.button("Limpar Perfis de Memória"):
+            reset_profiles()
+
+    st.subheader("Estado da Sessão Atual")
+    session_sizes = pd.DataFrame(
+        [{'Chave': key, 'Tamanho Aproximado (KB)': estimate_size(value) / 1024}
+         for key, value in st.session_state.items()]
+    )
+    if not session_sizes.empty:
+        st.dataframe(session_sizes.sort_values('Tamanho Aproximado (KB)', ascending=False))
+
+@register_job('export_table', "Exportação de tabela")
+def export_table_job(ctx, table):
+    """Job: stream a database table into CSV bytes."""
+    import csv
+    import io
+    from bulk_io import iter_table, TABLE_COLUMNS
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=TABLE_COLUMNS[table])
+    writer.writeheader()
+    for chunk in iter_table(table):
+        writer.writerows(chunk)
+        ctx.check()
+    return out.getvalue().encode('utf-8')
+
+def show_jobs_admin():
+    st.header("Tarefas em Segundo Plano")
+    if isinstance(get_storage(), SQLiteBackend):
+        table = st.selectbox("Tabela", EXPORTABLE_TABLES)
+        if st.button("Exportar Tabela (CSV)"):
+            try:
+                submit_job('export_table', {'table': table}, st.session_state.username)
+            except ValueError as e:
+                st.error(str(e))
+        show_jobs_panel(st.session_state.username, kinds=['export_table'], file_name=lambda job: 'exportacao.csv')
+
+    metrics = get_job_metrics()
+    if metrics:
+        metrics_df = pd.DataFrame(metrics)
+        metrics_df['status'] = metrics_df['status'].map(STATUS_LABELS)
+        metrics_df.columns = ['Tipo', 'Situação', 'Tarefas', 'Espera Média (s)', 'Execução Média (s)',
+                              'Execução Máxima (s)']
+        st.dataframe(metrics_df)
+
+def show_admin_page():
+    """Display the administration page (restricted to SELETOR_ADMIN_USERS)."""
+    st.title("Administração")
+    if not is_admin(st.session_state.get('username')):
+        st.error("Acesso restrito a administradores.")
+        return
+    show_query_log()
+    show_cache_stats()
+    show_catalog_status()
+    show_figure_stats()
+    show_memory_profile()
+    show_jobs_admin()
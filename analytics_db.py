@@ -0,0 +1,148 @@
+"""Read-only analytics snapshot of the application database.
+
+Reports and history pages read from a periodic copy of seletordltsaude.db
+made with the sqlite3 online backup API, so heavy queries never hold locks
+on the file that interactive saves write to. ANALYTICS_MAX_STALENESS sets how
+old, in seconds, the snapshot may get before it is refreshed; 0 routes reads
+to the live database. Non-SQLite storage backends are read directly.
+
+Each process runs a background thread that refreshes the snapshot once it
+is stale; reads keep using the existing snapshot meanwhile, and only wait
+for a copy when there is no snapshot yet. Refreshes take a file lock
+(ANALYTICS_DB_PATH + '.lock') and re-check the snapshot's age under it, so
+workers sharing the snapshot copy the live database once per interval
+between them rather than once each.
+"""
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    # No cross-process lock on this platform; workers may refresh concurrently
+    fcntl = None
+from storage import get_storage, SQLiteBackend
+from query_log import TimedConnection
+
+ANALYTICS_DB_PATH = os.environ.get('ANALYTICS_DB_PATH', 'seletordltsaude_analytics.db')
+ANALYTICS_MAX_STALENESS = float(os.environ.get('ANALYTICS_MAX_STALENESS', 60))
+# The backup copies this many pages at a time and sleeps in between so
+# writers can take the lock on the live database
+ANALYTICS_BACKUP_PAGES = int(os.environ.get('ANALYTICS_BACKUP_PAGES', 1024))
+ANALYTICS_BACKUP_SLEEP = float(os.environ.get('ANALYTICS_BACKUP_SLEEP', 0.005))
+
+_refresh_lock = threading.Lock()
+# Separate from _refresh_lock so requests never wait on a copy in progress
+_refresher_lock = threading.Lock()
+_refresher = None
+
+def snapshot_age():
+    """Seconds since the snapshot file was last replaced, or infinity if it does not exist."""
+    try:
+        return time.time() - os.path.getmtime(ANALYTICS_DB_PATH)
+    except OSError:
+        return float('inf')
+
+def refresh_snapshot():
+    """Copy the live database into a new snapshot and atomically swap it in."""
+    from database import get_db_connection
+
+    # A temporary file of our own, since other workers may be refreshing at the same time
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(ANALYTICS_DB_PATH)), suffix='.tmp')
+    os.close(fd)
+    try:
+        source = get_db_connection()
+        dest = sqlite3.connect(tmp_path)
+        try:
+            source.backup(dest, pages=ANALYTICS_BACKUP_PAGES, sleep=ANALYTICS_BACKUP_SLEEP)
+        finally:
+            dest.close()
+            source.close()
+        # Connections already open on the previous snapshot keep reading it until closed
+        os.replace(tmp_path, ANALYTICS_DB_PATH)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+@contextlib.contextmanager
+def _snapshot_lock():
+    """Hold the refresh lock of this process and, where supported, of every worker."""
+    with _refresh_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(ANALYTICS_DB_PATH + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _refresh_if_stale(max_staleness):
+    with _snapshot_lock():
+        # Another worker may have refreshed the snapshot while we waited for the lock
+        if snapshot_age() > max_staleness:
+            refresh_snapshot()
+
+def _refresh_loop(interval):
+    while True:
+        try:
+            _refresh_if_stale(interval)
+        except Exception as e:
+            print(f"Error refreshing analytics snapshot: {e}")
+        time.sleep(max(1.0, interval / 2))
+
+def start_snapshot_refresher(interval=None):
+    """Start, once per process, a daemon thread keeping the snapshot within interval seconds."""
+    global _refresher
+    interval = ANALYTICS_MAX_STALENESS if interval is None else interval
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_refresh_loop, args=(interval,),
+                                          name='analytics-snapshot', daemon=True)
+            _refresher.start()
+
+def get_analytics_connection(max_staleness=None):
+    """Open a read-only connection to the snapshot, kept within max_staleness seconds in the background.
+
+    Only the first read, before any snapshot exists, waits for a copy.
+    """
+    max_staleness = ANALYTICS_MAX_STALENESS if max_staleness is None else max_staleness
+    if max_staleness <= 0:
+        from database import get_db_connection
+        return get_db_connection()
+    start_snapshot_refresher(max_staleness)
+    if snapshot_age() == float('inf'):
+        _refresh_if_stale(max_staleness)
+    conn = sqlite3.connect(f'file:{ANALYTICS_DB_PATH}?mode=ro', uri=True, factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _read(name, *args):
+    storage = get_storage()
+    if not isinstance(storage, SQLiteBackend):
+        return getattr(storage, name)(*args)
+    conn = get_analytics_connection()
+    try:
+        return getattr(storage.db, name)(*args, conn=conn)
+    finally:
+        conn.close()
+
+def get_user_recommendations(username):
+    """Snapshot-backed get_user_recommendations."""
+    return _read('get_user_recommendations', username)
+
+def get_recommendation_rollups(granularity, dimension, since_bucket):
+    """Snapshot-backed get_recommendation_rollups."""
+    return _read('get_recommendation_rollups', granularity, dimension, since_bucket)
+
+def count_feedback_aspect(dlt, aspect):
+    """Snapshot-backed count_feedback_aspect."""
+    return _read('count_feedback_aspect', dlt, aspect)
+
+def get_feedback_aspect_summary(dlt=None):
+    """Snapshot-backed get_feedback_aspect_summary."""
+    return _read('get_feedback_aspect_summary', dlt)
@@ -0,0 +1,108 @@
+"""Per-answer and per-metric contribution breakdown of DLT scores.
+
+A DLT's score is the weighted sum of its metrics when it belongs to the DLT
+type selected by the answers, and 0 otherwise. Metric contributions are the
+individual metric x weight terms. Question contributions are exact Shapley
+values over the questions, where a question left out of a coalition counts
+as answered "Não". With 8 yes/no questions there are only 256 answer sets,
+so the value of every coalition is precomputed once into a matrix and every
+breakdown is a few vectorized sums over it, cached per catalog version and
+answer bitmask.
+"""
+from functools import lru_cache
+from math import factorial
+import numpy as np
+from dlt_data import questions
+from decision_logic import get_dlt_type_requirements, score_candidates
+from catalog import get_catalog
+
+QUESTION_IDS = [q['id'] for q in questions]
+
+def dlt_names(catalog):
+    return [name for name in catalog.dlt_classification if name in catalog.dlt_metrics]
+
+def metric_names(catalog):
+    return list(next(iter(catalog.dlt_type_weights.values())))
+
+def answers_to_mask(answers):
+    """Encode answers as a bitmask with bit i set when question i is answered "Sim"."""
+    return sum(1 << i for i, qid in enumerate(QUESTION_IDS) if answers.get(qid) == 'Sim')
+
+def mask_to_answers(mask):
+    return {qid: 'Sim' if mask >> i & 1 else 'Não' for i, qid in enumerate(QUESTION_IDS)}
+
+@lru_cache(maxsize=8)
+def value_matrix(catalog):
+    """Return V where V[mask, d] is the score of DLT d for the answer set mask."""
+    names = dlt_names(catalog)
+    type_scores = {}
+    values = np.zeros((1 << len(QUESTION_IDS), len(names)))
+    for mask in range(values.shape[0]):
+        required_type = get_dlt_type_requirements(mask_to_answers(mask))
+        if required_type not in type_scores:
+            scores = score_candidates(required_type, catalog=catalog)
+            type_scores[required_type] = np.array([scores.get(name, 0.0) for name in names])
+        values[mask] = type_scores[required_type]
+    values.setflags(write=False)
+    return values
+
+@lru_cache(maxsize=1 << 11)
+def question_contributions(catalog, mask):
+    """Return Q where Q[i, d] is the Shapley contribution of question i to DLT d."""
+    values = value_matrix(catalog)
+    players = [i for i in range(len(QUESTION_IDS)) if mask >> i & 1]
+    k = len(players)
+    contributions = np.zeros((len(QUESTION_IDS), values.shape[1]))
+    if k == 0:
+        return contributions
+
+    all_masks = np.arange(values.shape[0])
+    sizes = np.array([bin(m).count('1') for m in all_masks])
+    weight_by_size = np.array([factorial(s) * factorial(k - s - 1) / factorial(k) if s < k else 0.0
+                               for s in range(len(QUESTION_IDS) + 1)])
+    for i in players:
+        bit = 1 << i
+        others = mask & ~bit
+        # Every coalition drawn from the other "Sim" answers
+        coalitions = all_masks[(all_masks & ~others) == 0]
+        weights = weight_by_size[sizes[coalitions]]
+        marginal = values[coalitions | bit] - values[coalitions]
+        contributions[i] = weights @ marginal
+    contributions.setflags(write=False)
+    return contributions
+
+@lru_cache(maxsize=128)
+def metric_contributions(catalog, required_type):
+    """Return M where M[d, m] is metric m's weighted share of DLT d's score under required_type."""
+    metrics_order = metric_names(catalog)
+    metrics = np.array([[catalog.dlt_metrics[name]['metrics'][m] for m in metrics_order]
+                        for name in dlt_names(catalog)])
+    weights = np.array([catalog.dlt_type_weights[required_type][m] for m in metrics_order])
+    contributions = metrics * weights
+    contributions.setflags(write=False)
+    return contributions
+
+def explain_recommendation(answers):
+    """Return the score breakdown for answers.
+
+    The result holds 'questions' ({dlt: {question_id: contribution}}),
+    'metrics' ({dlt: {metric: contribution}}) for the DLTs of the selected
+    type, and 'baseline' ({dlt: score with every answer "Não"}); for each DLT
+    the baseline plus its question contributions equals its final score.
+    """
+    catalog = get_catalog()
+    names = dlt_names(catalog)
+    mask = answers_to_mask(answers)
+    required_type = get_dlt_type_requirements(mask_to_answers(mask))
+    questions_matrix = question_contributions(catalog, mask)
+    metrics_matrix = metric_contributions(catalog, required_type)
+    baseline = value_matrix(catalog)[0]
+    candidates = set(score_candidates(required_type, catalog=catalog))
+    return {
+        'dlt_type': required_type,
+        'questions': {name: dict(zip(QUESTION_IDS, questions_matrix[:, d]))
+                      for d, name in enumerate(names)},
+        'metrics': {name: dict(zip(metric_names(catalog), metrics_matrix[d]))
+                    for d, name in enumerate(names) if name in candidates},
+        'baseline': dict(zip(names, baseline))
+    }
@@ -0,0 +1,93 @@
+"""Render the constant tables, figures and CSV downloads of the app into a
+versioned artifact directory, loaded at runtime by static_assets.
+
+Usage: python build_static_assets.py [--output assets/static]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+from static_assets import STATIC_ASSETS_DIR, CURRENT_FILE, MANIFEST_FILE
+
+def collect_assets():
+    """Build every static asset, returning {kind: {name: (file_name, payload_bytes)}}."""
+    import pandas as pd
+    from dlt_data import frameworks_data, methodology_data, dlt_reference_data
+    from framework_charts import create_comparison_radar_chart, create_framework_heatmap
+    from downloads import DOWNLOAD_FORMATS, build_payload, download_name
+    from figure_export import figure_json, slim_figure
+    from metrics import create_gini_chart, create_entropy_chart
+
+    frameworks_df = pd.DataFrame(frameworks_data)
+    tables = {
+        'frameworks': frameworks_df,
+        'methodology': pd.DataFrame(methodology_data),
+        'dlt_reference': pd.DataFrame(dlt_reference_data)
+    }
+    figures = {
+        'comparison_radar': create_comparison_radar_chart(),
+        'framework_heatmap': create_framework_heatmap(),
+        'gini_distribution': create_gini_chart(),
+        'entropy_by_class': create_entropy_chart()
+    }
+    downloads = {}
+    for file_name, df in [('comparacao_frameworks.csv', frameworks_df),
+                          ('dlt_dados_consolidados.csv', tables['dlt_reference'])]:
+        for fmt in DOWNLOAD_FORMATS:
+            downloads[download_name(file_name, fmt)] = build_payload(df, fmt, file_name)
+
+    assets = {'tables': {}, 'figures': {}, 'downloads': {}}
+    for name, df in tables.items():
+        buffer = io.BytesIO()
+        df.to_pickle(buffer)
+        assets['tables'][name] = (f'tables/{name}.pkl', buffer.getvalue())
+    for name, fig in figures.items():
+        assets['figures'][name] = (f'figures/{name}.json', figure_json(slim_figure(fig)).encode('utf-8'))
+    for name, payload in downloads.items():
+        assets['downloads'][name] = (f'downloads/{name}', payload)
+    return assets
+
+def compute_version(assets):
+    """Hash every payload so identical builds share one version directory."""
+    digest = hashlib.sha256()
+    for kind in sorted(assets):
+        for name in sorted(assets[kind]):
+            file_name, payload = assets[kind][name]
+            digest.update(file_name.encode('utf-8'))
+            digest.update(payload)
+    return digest.hexdigest()[:12]
+
+def write_assets(assets, output_dir):
+    """Write the artifacts and manifest, then atomically point CURRENT at the new version."""
+    version = compute_version(assets)
+    version_dir = os.path.join(output_dir, version)
+    manifest = {'version': version}
+    for kind, entries in assets.items():
+        manifest[kind] = {}
+        for name, (file_name, payload) in entries.items():
+            path = os.path.join(version_dir, file_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(payload)
+            manifest[kind][name] = file_name
+
+    with open(os.path.join(version_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    current_tmp = os.path.join(output_dir, CURRENT_FILE + '.tmp')
+    with open(current_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(output_dir, CURRENT_FILE))
+    return version
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-computa os recursos estáticos do SeletorDLTSaude")
+    parser.add_argument('--output', default=STATIC_ASSETS_DIR, help="Diretório de saída dos artefatos")
+    args = parser.parse_args()
+
+    version = write_assets(collect_assets(), args.output)
+    print(f"Recursos estáticos gerados em {os.path.join(args.output, version)}")
+
+if __name__ == "__main__":
+    main()
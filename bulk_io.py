@@ -0,0 +1,210 @@
+"""Bulk import/export of users, recommendations and feedback.
+
+Imports stream CSV or JSONL rows into SQLite with large executemany batches,
+one transaction per batch, and rebuild the table's secondary indexes only
+after the load. Exports stream the table out in fixed-size chunks, so memory
+stays bounded regardless of table size.
+
+Usage:
+    python bulk_io.py import feedback feedback.jsonl --batch-size 50000
+    python bulk_io.py export feedback feedback.csv
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from database import (get_db_connection, backfill_feedback_aspects, rebuild_feedback_aspects,
+                      rebuild_recommendation_rollups)
+
+TABLE_COLUMNS = {
+    'users': ['username', 'password', 'created_at'],
+    'recommendations': ['id', 'username', 'scenario', 'dlt', 'consensus', 'timestamp'],
+    'feedback': ['id', 'username', 'scenario', 'dlt', 'consensus', 'rating', 'usefulness',
+                 'comment', 'specific_aspects', 'timestamp']
+}
+ON_CONFLICT = {'abort': 'INSERT', 'ignore': 'INSERT OR IGNORE', 'replace': 'INSERT OR REPLACE'}
+# Side tables maintained from a base table, refreshed once after a bulk load
+DERIVED_TABLES = {'feedback': ['feedback_aspects'], 'recommendations': ['recommendation_rollups']}
+
+def _file_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def read_rows(path, fmt=None):
+    """Yield one dict per record of a CSV or JSONL file without loading it whole."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if _file_format(path, fmt) == 'jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+def _to_db_value(table, column, value):
+    if value == '' and column == 'id':
+        return None
+    if table == 'users' and column == 'password' and isinstance(value, str):
+        # bcrypt.checkpw expects the stored hash as bytes, as create_user writes it
+        return value.encode('utf-8')
+    if column == 'specific_aspects' and isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _to_export_value(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+def _drop_secondary_indexes(conn, table):
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+    for index in indexes:
+        conn.execute(f'DROP INDEX "{index["name"]}"')
+    conn.commit()
+    return [index['sql'] for index in indexes]
+
+def import_rows(table, rows, batch_size=50000, on_conflict='abort', progress=None):
+    """Insert an iterable of dict rows into table in batched transactions.
+
+    Secondary indexes, including those of derived side tables, are dropped for
+    the duration of the load and rebuilt at the end, after which the derived
+    tables are refreshed, also when a batch fails, since earlier batches
+    stay committed. progress, if given, is called as
+    progress(table, rows_done, elapsed) after every committed batch. Returns
+    the number of rows inserted.
+    """
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Tabela desconhecida: {table}")
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    columns = [c for c in TABLE_COLUMNS[table] if c in first]
+    sql = (f"{ON_CONFLICT[on_conflict]} INTO {table} ({', '.join(columns)}) "
+           f"VALUES ({', '.join('?' for _ in columns)})")
+
+    conn = get_db_connection()
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -65536')
+    index_sql = []
+    for indexed_table in [table] + DERIVED_TABLES.get(table, []):
+        index_sql += _drop_secondary_indexes(conn, indexed_table)
+    start = time.perf_counter()
+    done = 0
+    try:
+        batch = []
+        for row in _chain(first, rows):
+            batch.append(tuple(_to_db_value(table, c, row.get(c)) for c in columns))
+            if len(batch) >= batch_size:
+                done += _flush(conn, sql, batch)
+                batch = []
+                if progress:
+                    progress(table, done, time.perf_counter() - start)
+        if batch:
+            done += _flush(conn, sql, batch)
+            if progress:
+                progress(table, done, time.perf_counter() - start)
+    finally:
+        try:
+            for statement in index_sql:
+                conn.execute(statement)
+            conn.commit()
+            # Batches committed before a failure stay in the table, so the
+            # derived tables are refreshed for them either way
+            _refresh_derived(conn, table, on_conflict)
+        finally:
+            conn.close()
+    return done
+
+def _refresh_derived(conn, table, on_conflict):
+    if table == 'feedback':
+        if on_conflict == 'replace':
+            rebuild_feedback_aspects(conn)
+        else:
+            backfill_feedback_aspects(conn)
+    elif table in ('recommendations', 'users'):
+        # Cohorts come from users.created_at, so both tables feed the rollups
+        rebuild_recommendation_rollups(conn)
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+def _flush(conn, sql, batch):
+    with conn:
+        conn.executemany(sql, batch)
+    return len(batch)
+
+def import_file(table, path, fmt=None, **kwargs):
+    """Stream a CSV or JSONL file into table; see import_rows for the options."""
+    return import_rows(table, read_rows(path, fmt), **kwargs)
+
+def iter_table(table, chunk_size=10000):
+    """Yield lists of row dicts from table, chunk_size rows at a time."""
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Tabela desconhecida: {table}")
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table}")
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            yield [{k: _to_export_value(row[k]) for k in row.keys()} for row in chunk]
+    finally:
+        conn.close()
+
+def export_table(table, path, fmt=None, chunk_size=10000, progress=None):
+    """Write table to a CSV or JSONL file chunk by chunk. Returns the row count."""
+    fmt = _file_format(path, fmt)
+    start = time.perf_counter()
+    done = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS[table])
+            writer.writeheader()
+        for chunk in iter_table(table, chunk_size):
+            if writer:
+                writer.writerows(chunk)
+            else:
+                f.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in chunk)
+            done += len(chunk)
+            if progress:
+                progress(table, done, time.perf_counter() - start)
+    return done
+
+def print_progress(table, done, elapsed):
+    rate = done / elapsed if elapsed else 0
+    print(f"{table}: {done} linhas em {elapsed:.1f}s ({rate:.0f} linhas/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação/exportação em massa do SeletorDLTSaude")
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('table', choices=sorted(TABLE_COLUMNS))
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                        help="Formato do arquivo (padrão: deduzido pela extensão)")
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--on-conflict', choices=sorted(ON_CONFLICT), default='abort')
+    args = parser.parse_args()
+
+    if args.action == 'import':
+        if not os.path.exists(args.path):
+            parser.error(f"Arquivo não encontrado: {args.path}")
+        total = import_file(args.table, args.path, args.format, batch_size=args.batch_size,
+                            on_conflict=args.on_conflict, progress=print_progress)
+        print(f"Importação concluída: {total} linhas em {args.table}")
+    else:
+        total = export_table(args.table, args.path, args.format, chunk_size=args.chunk_size,
+                             progress=print_progress)
+        print(f"Exportação concluída: {total} linhas de {args.table}")
+
+if __name__ == "__main__":
+    main()
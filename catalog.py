@@ -0,0 +1,357 @@
+"""External, hot-reloadable DLT catalog.
+
+The DLT metrics, per-type metric weights and DLT classification live in a
+JSON file (DLT_CATALOG_PATH, data/dlt_catalog.json by default) loaded on
+first use. get_catalog() checks the file at most every
+CATALOG_CHECK_INTERVAL seconds and, when it changed and still validates,
+swaps in the new Catalog with a single reference assignment; a file that
+fails to load leaves the current catalog in place. Callers take one
+snapshot per operation, and caches key their entries on content_hash so
+entries built from an older catalog are never served after a reload.
+
+Tenants may adjust dlt_metrics and dlt_type_weights through an overlay file
+TENANT_CATALOG_DIR/<tenant>.json holding only their deltas, e.g.
+{"dlt_metrics": {"Corda": {"metrics": {"security": 0.9}}}}. A tenant's
+catalog reads through OverlayView mappings on top of the shared base, so
+no tenant copies the base catalog, and its content_hash combines the base
+and overlay hashes. Code running inside use_tenant(tenant) gets that
+tenant's catalog from get_catalog().
+"""
+import contextlib
+import contextvars
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+DLT_CATALOG_PATH = os.environ.get(
+    'DLT_CATALOG_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'dlt_catalog.json')
+)
+CATALOG_CHECK_INTERVAL = float(os.environ.get('CATALOG_CHECK_INTERVAL', 2))
+TENANT_CATALOG_DIR = os.environ.get(
+    'TENANT_CATALOG_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tenants')
+)
+# Tenant names double as overlay file names
+TENANT_NAME_PATTERN = r'[\w-]+'
+
+def _parse_tenant_users(spec):
+    """Map users to tenants from "tenant:user,user;tenant:user", skipping invalid tenant names."""
+    tenant_users = {}
+    for entry in spec.split(';'):
+        tenant, _, users = entry.partition(':')
+        tenant = tenant.strip()
+        if not tenant:
+            continue
+        if not re.fullmatch(TENANT_NAME_PATTERN, tenant):
+            print(f"Error in SELETOR_TENANT_USERS: invalid tenant name {tenant!r}, entry ignored")
+            continue
+        tenant_users.update((user.strip(), tenant) for user in users.split(',') if user.strip())
+    return tenant_users
+
+# Semicolon-separated tenant assignments: "hospital_a:alice,bob;hospital_b:carol"
+TENANT_USERS = _parse_tenant_users(os.environ.get('SELETOR_TENANT_USERS', ''))
+# Catalog sections a tenant overlay may change
+OVERLAY_SECTIONS = ('dlt_metrics', 'dlt_type_weights')
+
+CLASSIFICATION_FIELDS = ['type', 'data_structure', 'group', 'algorithms', 'use_cases',
+                         'challenges', 'references', 'real_cases']
+
+class Catalog:
+    """One immutable version of the catalog; treat its dicts as read-only."""
+
+    def __init__(self, data, content_hash, path=None, mtime=None, overlay_hash=None):
+        self.version = data.get('version')
+        self.dlt_metrics = data['dlt_metrics']
+        self.dlt_type_weights = data['dlt_type_weights']
+        self.dlt_classification = data['dlt_classification']
+        self.content_hash = content_hash
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+        # Hash of the tenant overlay applied on top of the base catalog, if any
+        self.overlay_hash = overlay_hash
+
+    # Equal catalogs share cache entries, e.g. in functools.lru_cache keys
+    def __eq__(self, other):
+        return isinstance(other, Catalog) and other.content_hash == self.content_hash
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+class OverlayView(Mapping):
+    """Read-only mapping of base with the nested deltas of overlay on top.
+
+    Nested mappings present in both resolve to further views, so a tenant
+    holds nothing but its overlay and a few lazily created views.
+    """
+
+    def __init__(self, base, overlay):
+        self._base = base
+        self._overlay = overlay
+        self._children = {}
+
+    def __getitem__(self, key):
+        if key not in self._overlay:
+            return self._base[key]
+        value = self._overlay[key]
+        base_value = self._base.get(key)
+        if not (isinstance(value, Mapping) and isinstance(base_value, Mapping)):
+            return value
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = OverlayView(base_value, value)
+        return child
+
+    def __iter__(self):
+        yield from self._base
+        yield from (key for key in self._overlay if key not in self._base)
+
+    def __len__(self):
+        return len(self._base) + sum(1 for key in self._overlay if key not in self._base)
+
+def _is_number(value):
+    """Whether value is a finite int or float; bools and NaN are not metric values."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def validate_catalog(data):
+    """Raise ValueError describing the first inconsistency in catalog data."""
+    if not isinstance(data, dict):
+        raise ValueError("O catálogo deve ser um objeto JSON")
+    for section in ('dlt_metrics', 'dlt_type_weights', 'dlt_classification'):
+        if not isinstance(data.get(section), dict):
+            raise ValueError(f"Seção ausente ou inválida no catálogo: {section}")
+    for dlt_type, weights in data['dlt_type_weights'].items():
+        if not isinstance(weights, dict) or not all(_is_number(w) for w in weights.values()):
+            raise ValueError(f"Pesos não numéricos para o tipo {dlt_type}")
+    metric_names = {m for weights in data['dlt_type_weights'].values() for m in weights}
+    for name, entry in data['dlt_metrics'].items():
+        metrics = entry.get('metrics') if isinstance(entry, dict) else None
+        if not isinstance(metrics, dict):
+            raise ValueError(f"Métricas inválidas para {name}")
+        missing = metric_names - set(metrics)
+        if missing:
+            raise ValueError(f"Métricas ausentes para {name}: {', '.join(sorted(missing))}")
+        invalid = [metric for metric, value in metrics.items() if not _is_number(value)]
+        if invalid:
+            raise ValueError(f"Métricas não numéricas para {name}: {', '.join(sorted(invalid))}")
+    for name, info in data['dlt_classification'].items():
+        if not isinstance(info, dict):
+            raise ValueError(f"Classificação inválida para {name}")
+        missing = [field for field in CLASSIFICATION_FIELDS if field not in info]
+        if missing:
+            raise ValueError(f"Campos ausentes na classificação de {name}: {', '.join(missing)}")
+        invalid = [field for field in CLASSIFICATION_FIELDS if field != 'algorithms' and not isinstance(info[field], str)]
+        if not isinstance(info['algorithms'], list) or not all(isinstance(a, str) for a in info['algorithms']):
+            invalid.append('algorithms')
+        if invalid:
+            raise ValueError(f"Campos com tipo inválido na classificação de {name}: {', '.join(invalid)}")
+        if info['type'] not in data['dlt_type_weights']:
+            raise ValueError(f"Tipo sem pesos definidos para {name}: {info['type']}")
+
+def validate_overlay(overlay, base):
+    """Raise ValueError unless overlay only changes existing numeric metrics and weights of base."""
+    if not isinstance(overlay, dict):
+        raise ValueError("O overlay do catálogo deve ser um objeto JSON")
+    unknown = set(overlay) - set(OVERLAY_SECTIONS)
+    if unknown:
+        raise ValueError(f"Seções não permitidas no overlay: {', '.join(sorted(unknown))}")
+    metric_names = {m for weights in base.dlt_type_weights.values() for m in weights}
+
+    def check_values(values, owner):
+        if not isinstance(values, dict):
+            raise ValueError(f"Valores inválidos no overlay para {owner}")
+        for metric, value in values.items():
+            if metric not in metric_names:
+                raise ValueError(f"Métrica desconhecida no overlay para {owner}: {metric}")
+            if not _is_number(value):
+                raise ValueError(f"Valor não numérico no overlay para {owner}: {metric}")
+
+    for name, entry in overlay.get('dlt_metrics', {}).items():
+        if name not in base.dlt_metrics:
+            raise ValueError(f"DLT desconhecida no overlay: {name}")
+        if not isinstance(entry, dict) or set(entry) - {'metrics'}:
+            raise ValueError(f"Apenas 'metrics' pode ser alterado no overlay de {name}")
+        check_values(entry.get('metrics', {}), name)
+    for dlt_type, weights in overlay.get('dlt_type_weights', {}).items():
+        if dlt_type not in base.dlt_type_weights:
+            raise ValueError(f"Tipo de DLT desconhecido no overlay: {dlt_type}")
+        check_values(weights, dlt_type)
+
+def apply_overlay(base, overlay, overlay_hash):
+    """Return the catalog of base with overlay on top, sharing every unchanged value with base."""
+    data = {
+        'version': base.version,
+        'dlt_metrics': OverlayView(base.dlt_metrics, overlay.get('dlt_metrics', {})),
+        'dlt_type_weights': OverlayView(base.dlt_type_weights, overlay.get('dlt_type_weights', {})),
+        'dlt_classification': base.dlt_classification
+    }
+    content_hash = hashlib.sha256(f'{base.content_hash}:{overlay_hash}'.encode('utf-8')).hexdigest()[:16]
+    return Catalog(data, content_hash, base.path, base.mtime, overlay_hash)
+
+def load_catalog(path=DLT_CATALOG_PATH):
+    """Read, validate and hash the catalog file at path."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    validate_catalog(data)
+    return Catalog(data, hashlib.sha256(raw).hexdigest()[:16], path, os.path.getmtime(path))
+
+_catalog = None
+_last_check = 0.0
+# mtime of the file version last loaded or rejected, so a broken file is not retried on every check
+_seen_mtime = None
+_lock = threading.RLock()
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def get_base_catalog():
+    """Return the current shared catalog, reloading it first if the file changed."""
+    global _last_check
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - _last_check < CATALOG_CHECK_INTERVAL:
+        return catalog
+    with _lock:
+        if _catalog is None:
+            _swap(load_catalog())
+        elif time.monotonic() - _last_check >= CATALOG_CHECK_INTERVAL:
+            mtime = _file_mtime(_catalog.path)
+            if mtime is not None and mtime != _seen_mtime:
+                reload_catalog()
+        _last_check = time.monotonic()
+        return _catalog
+
+def _swap(catalog):
+    global _catalog, _seen_mtime
+    if _catalog is not None and catalog.content_hash != _catalog.content_hash:
+        print(f"DLT catalog reloaded: version {catalog.version}, hash {catalog.content_hash}")
+    _seen_mtime = catalog.mtime
+    _catalog = catalog
+
+def reload_catalog():
+    """Load the catalog file now; keep the current catalog and return False if it is invalid."""
+    global _seen_mtime
+    with _lock:
+        path = _catalog.path if _catalog is not None else DLT_CATALOG_PATH
+        try:
+            catalog = load_catalog(path)
+        except (OSError, ValueError) as e:
+            print(f"Error reloading DLT catalog {path}: {e}")
+            _seen_mtime = _file_mtime(path)
+            return False
+        _swap(catalog)
+        return True
+
+_current_tenant = contextvars.ContextVar('catalog_tenant', default=None)
+# tenant -> {'mtime', 'overlay', 'overlay_hash', 'base_hash', 'checked'} of its last valid overlay
+_overlays = {}
+# (base content_hash, overlay_hash) -> tenant Catalog, shared by tenants with identical overlays
+_tenant_catalogs = {}
+
+@contextlib.contextmanager
+def use_tenant(tenant):
+    """Make get_catalog() return tenant's catalog in this context (None for the base catalog)."""
+    token = _current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+def current_tenant():
+    return _current_tenant.get()
+
+def tenant_for_user(username):
+    return TENANT_USERS.get(username)
+
+def tenant_overlay_path(tenant):
+    if not re.fullmatch(TENANT_NAME_PATTERN, tenant):
+        raise ValueError(f"Nome de tenant inválido: {tenant}")
+    return os.path.join(TENANT_CATALOG_DIR, f'{tenant}.json')
+
+def load_overlay(path, base):
+    """Read, validate and hash the overlay file at path; return (overlay, overlay_hash)."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    overlay = json.loads(raw)
+    validate_overlay(overlay, base)
+    return overlay, hashlib.sha256(raw).hexdigest()[:16]
+
+def _get_overlay(tenant, base):
+    """Return the tenant's (overlay, overlay_hash), or None, rechecking its file like the base."""
+    state = _overlays.get(tenant)
+    if (state is not None and state['base_hash'] == base.content_hash
+            and time.monotonic() - state['checked'] < CATALOG_CHECK_INTERVAL):
+        return state['overlay']
+    with _lock:
+        state = _overlays.get(tenant) or {'mtime': None, 'overlay': None, 'base_hash': None}
+        path = tenant_overlay_path(tenant)
+        mtime = _file_mtime(path)
+        if mtime != state['mtime'] or state['base_hash'] != base.content_hash:
+            overlay = None
+            if mtime is not None:
+                try:
+                    overlay = load_overlay(path, base)
+                except (OSError, ValueError) as e:
+                    print(f"Error loading catalog overlay {path}: {e}")
+                    # Keep the last valid overlay while it still fits the base catalog
+                    overlay = state['overlay'] if state['base_hash'] == base.content_hash else None
+            state = {'mtime': mtime, 'overlay': overlay, 'base_hash': base.content_hash}
+        _overlays[tenant] = dict(state, checked=time.monotonic())
+        return state['overlay']
+
+def get_catalog(tenant=None):
+    """Return the catalog of tenant, or of the current use_tenant() tenant when None.
+
+    Without a tenant, or for a tenant without an overlay file or with an
+    empty one, this is the shared base catalog.
+    """
+    base = get_base_catalog()
+    tenant = tenant or _current_tenant.get()
+    if tenant is None:
+        return base
+    overlay = _get_overlay(tenant, base)
+    if overlay is None or not any(overlay[0].values()):
+        return base
+    key = (base.content_hash, overlay[1])
+    catalog = _tenant_catalogs.get(key)
+    if catalog is None:
+        with _lock:
+            catalog = _tenant_catalogs.get(key)
+            if catalog is None:
+                for stale in [k for k in _tenant_catalogs if k[0] != base.content_hash]:
+                    del _tenant_catalogs[stale]
+                catalog = _tenant_catalogs[key] = apply_overlay(base, *overlay)
+    return catalog
+
+def get_tenant_overlays():
+    """Return one row per tenant overlay file: tenant, overlay hash (None if invalid) and users."""
+    try:
+        files = sorted(f for f in os.listdir(TENANT_CATALOG_DIR) if f.endswith('.json'))
+    except OSError:
+        return []
+    rows = []
+    for file_name in files:
+        tenant = file_name[:-len('.json')]
+        try:
+            overlay = _get_overlay(tenant, get_base_catalog())
+        except ValueError:
+            continue
+        rows.append({
+            'tenant': tenant,
+            'overlay_hash': overlay[1] if overlay else None,
+            'users': ', '.join(sorted(u for u, t in TENANT_USERS.items() if t == tenant))
+        })
+    return rows
+
+def catalog_hash():
+    return get_catalog().content_hash
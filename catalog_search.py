@@ -0,0 +1,111 @@
+import re
+import sqlite3
+import threading
+import time
+import streamlit as st
+from dlt_data import consensus_algorithms, dlt_classes, frameworks_data
+from catalog import get_base_catalog
+
+DLT_SEARCH_FIELDS = ['group', 'use_cases', 'challenges', 'references', 'real_cases']
+
+_index = None
+# content_hash of the DLT catalog the index was built from
+_index_hash = None
+_index_lock = threading.Lock()
+
+def catalog_documents(catalog=None):
+    """Yield (kind, title, body) for every searchable entry of the DLT catalog."""
+    catalog = catalog or get_base_catalog()
+    for name, info in catalog.dlt_classification.items():
+        body = ' — '.join([info['type'], ', '.join(info['algorithms'])] +
+                          [info[field] for field in DLT_SEARCH_FIELDS])
+        yield ('DLT', name, body)
+    for name, description in consensus_algorithms.items():
+        yield ('Algoritmo de Consenso', name, description)
+    for name, description in dlt_classes.items():
+        yield ('Classe de DLT', name, description)
+    columns = [c for c in frameworks_data if c != 'Framework']
+    for i, name in enumerate(frameworks_data['Framework']):
+        yield ('Framework', name, ' — '.join(frameworks_data[c][i] for c in columns))
+
+def build_search_index(documents=None):
+    """Build an in-memory FTS5 index over the catalog documents."""
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE VIRTUAL TABLE catalog_fts USING fts5(
+                        kind UNINDEXED, title, body,
+                        tokenize = 'unicode61 remove_diacritics 2')""")
+    conn.executemany("INSERT INTO catalog_fts (kind, title, body) VALUES (?, ?, ?)",
+                     documents if documents is not None else catalog_documents())
+    conn.execute("INSERT INTO catalog_fts (catalog_fts) VALUES ('optimize')")
+    conn.commit()
+    return conn
+
+def get_search_index():
+    """Return the process-wide search index, rebuilding it when the DLT catalog changed.
+
+    Tenant overlays never touch the searchable classification, so every
+    tenant shares the index of the base catalog.
+    """
+    global _index, _index_hash
+    catalog = get_base_catalog()
+    if _index is None or _index_hash != catalog.content_hash:
+        with _index_lock:
+            if _index is None or _index_hash != catalog.content_hash:
+                _index = build_search_index(list(catalog_documents(catalog)))
+                _index_hash = catalog.content_hash
+    return _index
+
+def reset_search_index():
+    """Drop the search index so the next search rebuilds it from the current catalog."""
+    global _index
+    with _index_lock:
+        _index = None
+
+def to_match_query(text):
+    """Turn free text into an FTS5 query that prefix-matches every word."""
+    return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', text))
+
+def search_catalog(text, limit=10, highlight=('**', '**')):
+    """Return ranked catalog matches for text with highlighted snippets.
+
+    Each result is a dict with kind, title, snippet and score (bm25, lower is
+    better); titles weigh ten times more than body text.
+    """
+    query = to_match_query(text)
+    if not query:
+        return []
+    conn = get_search_index()
+    with _index_lock:
+        rows = conn.execute(
+            """SELECT kind,
+                      highlight(catalog_fts, 1, ?, ?) AS title,
+                      snippet(catalog_fts, 2, ?, ?, '…', 24) AS snippet,
+                      bm25(catalog_fts, 0.0, 10.0, 1.0) AS score
+               FROM catalog_fts
+               WHERE catalog_fts MATCH ?
+               ORDER BY score
+               LIMIT ?""",
+            (highlight[0], highlight[1], highlight[0], highlight[1], query, limit)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def show_search_page():
+    """Display the catalog search box and ranked results."""
+    st.title("Busca no Catálogo")
+    st.write("Pesquise DLTs, algoritmos de consenso, casos de uso, desafios, referências e frameworks.")
+
+    text = st.text_input("Termos de busca", key="catalog_search_query",
+                         placeholder="Ex.: rastreamento de medicamentos")
+    if not text:
+        return
+
+    start = time.perf_counter()
+    results = search_catalog(text, limit=20)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    st.caption(f"{len(results)} resultado(s) em {elapsed_ms:.1f} ms")
+    for result in results:
+        st.markdown(f"**{result['kind']}** · {result['title']}")
+        st.markdown(result['snippet'])
+        st.markdown("---")
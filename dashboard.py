@@ -0,0 +1,51 @@
+import datetime
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from analytics_db import get_recommendation_rollups
+from figure_export import show_figure
+
+GRANULARITY_OPTIONS = {
+    'Diária': ('day', [7, 30, 90, 365]),
+    'Horária': ('hour', [24, 48, 168])
+}
+DIMENSION_OPTIONS = {
+    'DLT': 'dlt',
+    'Algoritmo de Consenso': 'consensus',
+    'Coorte de Usuários': 'cohort'
+}
+
+def window_start(granularity, periods, now=None):
+    """Return the first bucket of a window covering the last `periods` buckets."""
+    now = now or datetime.datetime.now()
+    if granularity == 'hour':
+        return (now - datetime.timedelta(hours=periods - 1)).strftime('%Y-%m-%dT%H:00')
+    return (now - datetime.timedelta(days=periods - 1)).strftime('%Y-%m-%d')
+
+def show_trends_dashboard():
+    """Display recommendation selection trends from the hourly/daily rollups."""
+    st.title("Tendências de Recomendações")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        granularity_label = st.selectbox("Granularidade", list(GRANULARITY_OPTIONS))
+    granularity, windows = GRANULARITY_OPTIONS[granularity_label]
+    with col2:
+        periods = st.selectbox("Janela (períodos)", windows)
+    with col3:
+        dimension_label = st.selectbox("Agrupar por", list(DIMENSION_OPTIONS))
+
+    rollups = get_recommendation_rollups(granularity, DIMENSION_OPTIONS[dimension_label],
+                                         window_start(granularity, periods))
+    if not rollups:
+        st.info("Nenhuma recomendação salva no período selecionado.")
+        return
+
+    df = pd.DataFrame([tuple(r) for r in rollups], columns=['Período', dimension_label, 'Recomendações'])
+    fig = px.bar(df, x='Período', y='Recomendações', color=dimension_label,
+                 title=f"Recomendações por {dimension_label.lower()}")
+    show_figure(fig, 'recommendation_trends', use_container_width=True)
+
+    totals = df.groupby(dimension_label)['Recomendações'].sum().sort_values(ascending=False)
+    st.subheader("Total no Período")
+    st.dataframe(totals.reset_index())
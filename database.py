@@ -1,9 +1,25 @@
 import sqlite3
 import datetime
 import json
+import itertools
+import os
+import time
+from query_log import TimedConnection
+from ttl_cache import TTLCache
+
+# Per-process cache of user records; other workers see a password change
+# or new account only after USER_CACHE_TTL / USER_CACHE_NEGATIVE_TTL
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 300))
+USER_CACHE_NEGATIVE_TTL = float(os.environ.get('USER_CACHE_NEGATIVE_TTL', 30))
+_user_cache = TTLCache(max_entries=int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000)), ttl=USER_CACHE_TTL)
+_NO_USER = object()
+# Bumped on every cache invalidation; get_user only caches what it read if
+# no invalidation happened during its query
+_user_cache_version = itertools.count(1)
+_last_invalidation = 0
 
 def get_db_connection():
-    conn = sqlite3.connect('seletordltsaude.db')
+    conn = sqlite3.connect('seletordltsaude.db', factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -13,7 +29,8 @@ def init_db():
 
     c.execute('''CREATE TABLE IF NOT EXISTS users
                  (username TEXT PRIMARY KEY, 
-                  password TEXT)''')
+                  password TEXT,
+                  created_at DATETIME)''')
 
     c.execute('''CREATE TABLE IF NOT EXISTS recommendations
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,6 +52,45 @@ def init_db():
                   specific_aspects TEXT,
                   timestamp DATETIME)''')
 
+    # One row per aspect mentioned in feedback.specific_aspects, so aspect-level
+    # analytics hit an index instead of parsing every JSON blob in Python
+    c.execute('''CREATE TABLE IF NOT EXISTS feedback_aspects
+                 (feedback_id INTEGER,
+                  username TEXT,
+                  dlt TEXT,
+                  aspect TEXT,
+                  value TEXT,
+                  flagged INTEGER)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_feedback_aspects_dlt_aspect
+                 ON feedback_aspects (dlt, aspect, flagged, username)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_feedback_aspects_feedback
+                 ON feedback_aspects (feedback_id)''')
+
+    # Recommendation counts per hour/day bucket, kept up to date by
+    # save_recommendation so trend queries only read the requested window
+    c.execute('''CREATE TABLE IF NOT EXISTS recommendation_rollups
+                 (granularity TEXT,
+                  dimension TEXT,
+                  bucket TEXT,
+                  value TEXT,
+                  count INTEGER,
+                  PRIMARY KEY (granularity, dimension, bucket, value)) WITHOUT ROWID''')
+
+    # Session tokens revoked before expiring; rows are dropped once the token expires
+    c.execute('''CREATE TABLE IF NOT EXISTS revoked_session_tokens
+                 (token_id TEXT PRIMARY KEY,
+                  expires_at REAL) WITHOUT ROWID''')
+
+    # Tokens of username issued at or before revoked_before are rejected
+    c.execute('''CREATE TABLE IF NOT EXISTS session_token_cutoffs
+                 (username TEXT PRIMARY KEY,
+                  revoked_before REAL) WITHOUT ROWID''')
+
+    # One-off data migrations already applied to this database
+    c.execute('''CREATE TABLE IF NOT EXISTS migrations
+                 (name TEXT PRIMARY KEY,
+                  applied_at TEXT) WITHOUT ROWID''')
+
     conn.commit()
     conn.close()
 
@@ -42,22 +98,63 @@ def create_user(username, hashed_password):
     conn = get_db_connection()
     c = conn.cursor()
     try:
-        c.execute("INSERT INTO users (username, password) VALUES (?, ?)", 
-                  (username, hashed_password))
+        c.execute("INSERT INTO users (username, password, created_at) VALUES (?, ?, ?)", 
+                  (username, hashed_password, datetime.datetime.now().isoformat()))
         conn.commit()
+        _invalidate_user(username)
         return True
     except sqlite3.IntegrityError:
         return False
     finally:
         conn.close()
 
+def _invalidate_user(username):
+    global _last_invalidation
+    _last_invalidation = next(_user_cache_version)
+    _user_cache.invalidate(username)
+
 def get_user(username):
+    cached = _user_cache.get(username)
+    if cached is not None:
+        return None if cached is _NO_USER else dict(cached)
+    version = _last_invalidation
     conn = get_db_connection()
     c = conn.cursor()
     c.execute("SELECT * FROM users WHERE username = ?", (username,))
     user = c.fetchone()
     conn.close()
-    return user
+    # A create_user or update_password committed during the query may have
+    # been missed by it; caching the result would outlive the invalidation
+    fresh = _last_invalidation == version
+    if user is None:
+        # Unknown usernames are cached too, briefly, so repeated attempts skip the query
+        if fresh:
+            _user_cache.set(username, _NO_USER, ttl=USER_CACHE_NEGATIVE_TTL)
+        return None
+    user = dict(user)
+    if fresh:
+        _user_cache.set(username, user)
+    return dict(user)
+
+def update_password(username, hashed_password):
+    """Replace a user's password hash and revoke every session token issued so far.
+
+    Return False if the user does not exist.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("UPDATE users SET password = ? WHERE username = ?", (hashed_password, username))
+    updated = c.rowcount > 0
+    if updated:
+        c.execute("INSERT OR REPLACE INTO session_token_cutoffs (username, revoked_before) VALUES (?, ?)",
+                  (username, time.time()))
+    conn.commit()
+    conn.close()
+    _invalidate_user(username)
+    return updated
+
+def get_user_cache_stats():
+    return _user_cache.stats()
 
 def save_recommendation(username, scenario, recommendation):
     conn = get_db_connection()
@@ -68,17 +165,95 @@ def save_recommendation(username, scenario, recommendation):
                  VALUES (?, ?, ?, ?, ?)""",
               (username, scenario, recommendation['dlt'], 
                recommendation['consensus'], timestamp))
+    c.execute("SELECT created_at FROM users WHERE username = ?", (username,))
+    user = c.fetchone()
+    cohort = _user_cohort(user['created_at'] if user else None)
+    c.executemany('''INSERT INTO recommendation_rollups (granularity, dimension, bucket, value, count)
+                     VALUES (?, ?, ?, ?, 1)
+                     ON CONFLICT (granularity, dimension, bucket, value)
+                     DO UPDATE SET count = count + 1''',
+                  [(granularity, dimension, _bucket(granularity, timestamp), value)
+                   for granularity in ROLLUP_GRANULARITIES
+                   for dimension, value in (('dlt', recommendation['dlt']),
+                                            ('consensus', recommendation['consensus']),
+                                            ('cohort', cohort))])
     conn.commit()
     conn.close()
 
-def get_user_recommendations(username):
+def revoke_session_token(token_id, expires_at):
     conn = get_db_connection()
     c = conn.cursor()
+    c.execute("INSERT OR IGNORE INTO revoked_session_tokens (token_id, expires_at) VALUES (?, ?)",
+              (token_id, expires_at))
+    c.execute("DELETE FROM revoked_session_tokens WHERE expires_at < ?", (time.time(),))
+    conn.commit()
+    conn.close()
+
+def is_session_token_revoked(token_id, username, issued_at):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("""SELECT EXISTS (SELECT 1 FROM revoked_session_tokens WHERE token_id = ?)
+                     OR EXISTS (SELECT 1 FROM session_token_cutoffs
+                                WHERE username = ? AND revoked_before >= ?)""",
+              (token_id, username, issued_at))
+    revoked = bool(c.fetchone()[0])
+    conn.close()
+    return revoked
+
+ROLLUP_GRANULARITIES = ('hour', 'day')
+ROLLUP_DIMENSIONS = ('dlt', 'consensus', 'cohort')
+NO_COHORT = 'Sem coorte'
+
+def _bucket(granularity, timestamp):
+    # ISO timestamps sort lexically, so buckets are plain string prefixes
+    return timestamp[:13] + ':00' if granularity == 'hour' else timestamp[:10]
+
+def _user_cohort(created_at):
+    return created_at[:7] if created_at else NO_COHORT
+
+def rebuild_recommendation_rollups(conn=None):
+    """Recompute every rollup bucket from the recommendations table."""
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM recommendation_rollups")
+    buckets = {'hour': "substr(r.timestamp, 1, 13) || ':00'", 'day': "substr(r.timestamp, 1, 10)"}
+    values = {'dlt': "r.dlt", 'consensus': "r.consensus",
+              'cohort': f"COALESCE(substr(u.created_at, 1, 7), '{NO_COHORT}')"}
+    for granularity in ROLLUP_GRANULARITIES:
+        for dimension in ROLLUP_DIMENSIONS:
+            c.execute(f'''INSERT INTO recommendation_rollups (granularity, dimension, bucket, value, count)
+                          SELECT ?, ?, {buckets[granularity]}, {values[dimension]}, COUNT(*)
+                          FROM recommendations r LEFT JOIN users u ON u.username = r.username
+                          WHERE r.timestamp IS NOT NULL
+                          GROUP BY 3, 4''', (granularity, dimension))
+    conn.commit()
+    if own_conn:
+        conn.close()
+
+def get_recommendation_rollups(granularity, dimension, since_bucket, conn=None):
+    """Return (bucket, value, count) rows from since_bucket onwards, oldest first."""
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
+    c.execute('''SELECT bucket, value, count FROM recommendation_rollups
+                 WHERE granularity = ? AND dimension = ? AND bucket >= ?
+                 ORDER BY bucket''', (granularity, dimension, since_bucket))
+    rollups = c.fetchall()
+    if own_conn:
+        conn.close()
+    return rollups
+
+def get_user_recommendations(username, conn=None):
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
     c.execute("""SELECT * FROM recommendations 
                  WHERE username = ? 
                  ORDER BY timestamp DESC LIMIT 5""", (username,))
     recommendations = c.fetchall()
-    conn.close()
+    if own_conn:
+        conn.close()
     return recommendations
 
 def save_feedback(username, scenario, dlt, consensus_group, feedback_data):
@@ -91,9 +266,85 @@ def save_feedback(username, scenario, dlt, consensus_group, feedback_data):
               (username, scenario, dlt, consensus_group,
                feedback_data['rating'], feedback_data['usefulness'], feedback_data['comment'],
                json.dumps(feedback_data['specific_aspects']), timestamp))
+    _index_feedback_aspects(c, "f.id = ?", (c.lastrowid,))
     conn.commit()
     conn.close()
 
+# Aspects may be stored as {"aspect": value} or as a list of flagged aspect names
+# and an aspect counts as flagged unless its value is falsy or a "Não"
+_FEEDBACK_ASPECTS_INSERT = '''INSERT INTO feedback_aspects (feedback_id, username, dlt, aspect, value, flagged)
+    SELECT f.id, f.username, f.dlt,
+           CASE WHEN json_type(f.specific_aspects) = 'array' THEN j.value ELSE j.key END,
+           CASE WHEN json_type(f.specific_aspects) = 'array' THEN 1 ELSE j.value END,
+           CASE WHEN json_type(f.specific_aspects) = 'array' THEN 1
+                ELSE COALESCE(j.value, 0) NOT IN (0, '', 'Não', 'não', 'false') END
+    FROM feedback f, json_each(f.specific_aspects) j
+    WHERE json_valid(f.specific_aspects) AND {condition}'''
+
+def _index_feedback_aspects(c, condition, params=()):
+    c.execute(_FEEDBACK_ASPECTS_INSERT.format(condition=condition), params)
+    return c.rowcount
+
+def backfill_feedback_aspects(conn=None):
+    """Index aspects of feedback rows that have none indexed yet. Returns rows added.
+
+    Rows are found with an anti-join rather than by id, so rows imported with
+    explicit ids below already indexed ones are picked up too.
+    """
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
+    added = _index_feedback_aspects(
+        c, "NOT EXISTS (SELECT 1 FROM feedback_aspects a WHERE a.feedback_id = f.id)")
+    conn.commit()
+    if own_conn:
+        conn.close()
+    return added
+
+def rebuild_feedback_aspects(conn=None):
+    """Rebuild the whole aspect index from feedback.specific_aspects. Returns rows added."""
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM feedback_aspects")
+    added = _index_feedback_aspects(c, "1")
+    conn.commit()
+    if own_conn:
+        conn.close()
+    return added
+
+def count_feedback_aspect(dlt, aspect, conn=None):
+    """Count distinct users who flagged aspect in their feedback for dlt."""
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
+    c.execute("""SELECT COUNT(DISTINCT username) FROM feedback_aspects
+                 WHERE dlt = ? AND aspect = ? AND flagged = 1""",
+              (dlt, aspect))
+    count = c.fetchone()[0]
+    if own_conn:
+        conn.close()
+    return count
+
+def get_feedback_aspect_summary(dlt=None, conn=None):
+    """Return flag and distinct-user counts per (dlt, aspect), optionally for one DLT."""
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    c = conn.cursor()
+    query = """SELECT dlt, aspect, COUNT(*) AS flags, COUNT(DISTINCT username) AS users
+                FROM feedback_aspects
+                WHERE flagged = 1 {dlt_filter}
+                GROUP BY dlt, aspect
+                ORDER BY dlt, flags DESC"""
+    if dlt is None:
+        c.execute(query.format(dlt_filter=""))
+    else:
+        c.execute(query.format(dlt_filter="AND dlt = ?"), (dlt,))
+    summary = c.fetchall()
+    if own_conn:
+        conn.close()
+    return summary
+
 def add_specific_aspects_column():
     conn = get_db_connection()
     c = conn.cursor()
@@ -107,5 +358,51 @@ def add_specific_aspects_column():
     finally:
         conn.close()
 
+def add_user_created_at_column():
+    conn = get_db_connection()
+    c = conn.cursor()
+    try:
+        c.execute("ALTER TABLE users ADD COLUMN created_at DATETIME")
+        conn.commit()
+        print("Added 'created_at' column to users table")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            print(f"Error adding 'created_at' column: {e}")
+    finally:
+        conn.close()
+
+def init_feedback_aspects():
+    """Index the aspects of feedback that predates the aspect table, once per database.
+
+    New feedback is indexed as it is saved and bulk imports backfill their own
+    rows, so later starts skip the scan of the whole feedback table.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    # Taken before the check so concurrently starting workers run it only once
+    c.execute("BEGIN IMMEDIATE")
+    c.execute("SELECT 1 FROM migrations WHERE name = 'feedback_aspects_backfill'")
+    if c.fetchone() is None:
+        c.execute("INSERT INTO migrations (name, applied_at) VALUES ('feedback_aspects_backfill', ?)",
+                  (datetime.datetime.now().isoformat(),))
+        backfill_feedback_aspects(conn)
+    conn.commit()
+    conn.close()
+
+def init_recommendation_rollups():
+    """Build the rollups once for databases that predate them."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT EXISTS (SELECT 1 FROM recommendation_rollups)")
+    has_rollups = c.fetchone()[0]
+    c.execute("SELECT EXISTS (SELECT 1 FROM recommendations)")
+    has_recommendations = c.fetchone()[0]
+    if has_recommendations and not has_rollups:
+        rebuild_recommendation_rollups(conn)
+    conn.close()
+
 init_db()
 add_specific_aspects_column()
+add_user_created_at_column()
+init_feedback_aspects()
+init_recommendation_rollups()
@@ -1,94 +1,83 @@
+import heapq
+import os
 import statistics
-from dlt_data import questions, dlt_classes, consensus_algorithms, dlt_metrics, dlt_type_weights
-
-# DLT classification structure based on the provided data
-dlt_classification = {
-    'Hyperledger Fabric': {
-        'type': 'DLT Permissionada Privada',
-        'data_structure': 'Blockchain',
-        'group': 'Alta Segurança e Controle dos Dados',
-        'algorithms': ['RAFT', 'PBFT'],
-        'use_cases': 'Rastreabilidade de medicamentos na cadeia de suprimentos, Gestão de Registros Médicos Eletrônicos (EHR)',
-        'challenges': 'Baixa escalabilidade para redes muito grandes',
-        'references': 'Mehmood et al. (2025) - "BLPCA-ledger: A lightweight plenum consensus protocols for consortium blockchain"',
-        'real_cases': 'IBM Food Trust, PharmaLedger'
-    },
-    'VeChain': {
-        'type': 'DLT Híbrida',
-        'data_structure': 'Blockchain',
-        'group': 'Alta Eficiência Operacional em Redes Locais',
-        'algorithms': ['PoA'],
-        'use_cases': 'Rastreamento de suprimentos médicos e cadeia farmacêutica',
-        'challenges': 'Dependência de validadores centralizados',
-        'references': 'Popoola et al. (2024) - "A critical literature review of security and privacy in smart home healthcare schemes adopting IoT & blockchain"',
-        'real_cases': 'VeChain ToolChain (uso por hospitais na China para rastrear vacinas e medicamentos)'
-    },
-    'Quorum': {
-        'type': 'DLT Híbrida',
-        'data_structure': 'Blockchain',
-        'group': 'Escalabilidade e Governança Flexível',
-        'algorithms': ['RAFT', 'IBFT'],
-        'use_cases': 'Monitoramento e rastreamento de medicamentos',
-        'challenges': 'Escalabilidade limitada em redes públicas',
-        'references': 'Mehmood et al. (2025) - "BLPCA-ledger: A lightweight plenum consensus protocols for consortium blockchain"',
-        'real_cases': 'Mediledger (rastreamento de cadeia farmacêutica nos EUA)'
-    },
-    'IOTA': {
-        'type': 'DLT com Consenso Delegado',
-        'data_structure': 'DAG',
-        'group': 'Alta Escalabilidade em Redes IoT',
-        'algorithms': ['Tangle'],
-        'use_cases': 'Compartilhamento seguro de dados de pacientes via IoT',
-        'challenges': 'Maturidade tecnológica (não totalmente implementada)',
-        'references': 'Salim et al. (2024) - "Privacy-preserving and scalable federated blockchain scheme for healthcare 4.0"',
-        'real_cases': 'Projeto de mobilidade urbana em Taipei utilizando IOTA para segurança de dados'
-    },
-    'Ripple': {
-        'type': 'DLT com Consenso Delegado',
-        'data_structure': 'Blockchain',
-        'group': 'Alta Eficiência Operacional em Redes Locais',
-        'algorithms': ['Ripple Consensus Algorithm'],
-        'use_cases': 'Processamento eficiente de transações e segurança de dados',
-        'challenges': 'Centralização nos validadores principais',
-        'references': 'Makhdoom et al. (2024) - "PrivySeC: A secure and privacy-compliant distributed framework for personal data sharing in IoT ecosystems"',
-        'real_cases': 'Santander e American Express (uso para transações financeiras e de remessas internacionais)'
-    },
-    'Bitcoin': {
-        'type': 'DLT Pública',
-        'data_structure': 'Blockchain',
-        'group': 'Alta Segurança e Descentralização',
-        'algorithms': ['PoW'],
-        'use_cases': 'Armazenamento seguro de dados médicos críticos',
-        'challenges': 'Consumo energético elevado, escalabilidade limitada',
-        'references': 'Liu et al. (2024) - "A systematic study on integrating blockchain in healthcare for electronic health record management and tracking medical supplies"',
-        'real_cases': 'MedRec (gestão de registros médicos baseada em blockchain no MIT)'
-    },
-    'Ethereum (PoW)': {
-        'type': 'DLT Pública',
-        'data_structure': 'Blockchain',
-        'group': 'Alta Segurança e Descentralização',
-        'algorithms': ['PoW'],
-        'use_cases': 'Contratos inteligentes e registros médicos eletrônicos',
-        'challenges': 'Consumo de energia elevado',
-        'references': 'Makhdoom et al. (2024) - "PrivySeC: A secure and privacy-compliant distributed framework for personal data sharing in IoT ecosystems"',
-        'real_cases': 'MedRec (gestão de registros médicos baseada em blockchain no MIT)'
-    },
-    'Ethereum 2.0': {
-        'type': 'DLT Pública Permissionless',
-        'data_structure': 'Blockchain',
-        'group': 'Escalabilidade e Governança Flexível',
-        'algorithms': ['PoS'],
-        'use_cases': 'Aceleração de ensaios clínicos e compartilhamento de dados',
-        'challenges': 'Governança flexível, mas centralização é possível',
-        'references': 'Nawaz et al. (2024) - "Hyperledger sawtooth based supply chain traceability system for counterfeit drugs"',
-        'real_cases': 'ConsenSys Health (ensaios clínicos e compartilhamento de dados de saúde)'
-    }
+from collections.abc import Mapping
+from dlt_data import questions, dlt_classes, consensus_algorithms
+from ttl_cache import TTLCache
+from catalog import get_catalog
+
+# Shared across sessions: identical answers, weights and catalog always produce the same
+# scores. Catalog-dependent keys include its content hash, so a reload never serves stale entries.
+_scoring_cache = TTLCache(
+    max_entries=int(os.environ.get('SCORING_CACHE_MAX_ENTRIES', 4096)),
+    max_bytes=int(os.environ.get('SCORING_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    ttl=float(os.environ.get('SCORING_CACHE_TTL', 3600))
+)
+
+def __getattr__(name):
+    # Compatibility for decision_logic.dlt_classification, now part of the external catalog
+    if name == 'dlt_classification':
+        return get_catalog().dlt_classification
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+DLT_TYPES = [
+    'DLT Permissionada Privada',
+    'DLT Híbrida',
+    'DLT com Consenso Delegado',
+    'DLT Pública',
+    'DLT Pública Permissionless'
+]
+
+# Points a "Sim" answer adds to each DLT type; the type with most points is required
+TYPE_RULES = {
+    'privacy': {'DLT Permissionada Privada': 2, 'DLT Híbrida': 1},
+    'integration': {'DLT Híbrida': 2, 'DLT com Consenso Delegado': 1},
+    'scalability': {'DLT Pública Permissionless': 2, 'DLT com Consenso Delegado': 1},
+    'network_security': {'DLT Pública': 2, 'DLT Permissionada Privada': 1}
 }
 
+def _canonical(value):
+    """Return a hashable, order-independent form of answers, weights or scores."""
+    if isinstance(value, Mapping):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, float):
+        return round(value, 12)
+    return value
+
+def get_scoring_cache_stats():
+    """Return hit, miss and eviction counters of the scoring cache for monitoring."""
+    return _scoring_cache.stats()
+
+def invalidate_scoring_cache():
+    """Drop every memoized score; call whenever the DLT catalog changes."""
+    _scoring_cache.invalidate()
+
+def _unavailable_recommendation():
+    return {
+        "dlt": "Não disponível",
+        "dlt_type": "Não disponível",
+        "data_structure": "Não disponível",
+        "group": "Não disponível",
+        "algorithms": [],
+        "evaluation_matrix": {},
+        "metrics": {},
+        "details": {}
+    }
+
 def normalize_scores(scores):
     """Normalize scores to a 0-1 range."""
     if not scores:
         return {}
+    key = ('normalize', _canonical(scores))
+    normalized = _scoring_cache.get(key)
+    if normalized is None:
+        normalized = _normalize_scores(scores)
+        _scoring_cache.set(key, normalized)
+    return dict(normalized)
+
+def _normalize_scores(scores):
     min_score = min(scores.values())
     max_score = max(scores.values())
     if max_score == min_score:
@@ -97,120 +86,218 @@ def normalize_scores(scores):
 
 def get_dlt_type_requirements(answers):
     """Determine DLT type requirements based on user answers."""
-    type_scores = {
-        'DLT Permissionada Privada': 0,
-        'DLT Híbrida': 0,
-        'DLT com Consenso Delegado': 0,
-        'DLT Pública': 0,
-        'DLT Pública Permissionless': 0
+    key = ('dlt_type', _canonical(answers))
+    required_type = _scoring_cache.get(key)
+    if required_type is None:
+        required_type = _get_dlt_type_requirements(answers)
+        _scoring_cache.set(key, required_type)
+    return required_type
+
+def _get_dlt_type_requirements(answers):
+    type_scores = dict.fromkeys(DLT_TYPES, 0)
+    for question_id, points in TYPE_RULES.items():
+        if answers.get(question_id) == 'Sim':
+            for dlt_type, value in points.items():
+                type_scores[dlt_type] += value
+    return _select_type(type_scores)
+
+def _select_type(type_scores):
+    # Ties go to the type listed first in DLT_TYPES
+    return max(type_scores.items(), key=lambda x: x[1])[0]
+
+def score_candidates(required_type, weights=None, catalog=None):
+    """Score every catalog DLT of required_type with that type's metric weights."""
+    catalog = catalog or get_catalog()
+    if weights is None:
+        weights = catalog.dlt_type_weights
+    scores = {}
+    for dlt_name, dlt_info in catalog.dlt_classification.items():
+        if dlt_info['type'] == required_type and dlt_name in catalog.dlt_metrics:
+            metrics = catalog.dlt_metrics[dlt_name]['metrics']
+            scores[dlt_name] = sum(
+                metrics[metric] * weight
+                for metric, weight in weights[required_type].items()
+            )
+    return scores
+
+def score_catalog(required_type, weights=None, catalog=None):
+    """Score every catalog DLT with required_type's weights, whatever its own type."""
+    catalog = catalog or get_catalog()
+    if weights is None:
+        weights = catalog.dlt_type_weights
+    key = ('catalog_scores', catalog.content_hash, required_type, _canonical(weights))
+    scores = _scoring_cache.get(key)
+    if scores is None:
+        type_weights = weights[required_type]
+        scores = {
+            dlt_name: sum(catalog.dlt_metrics[dlt_name]['metrics'][metric] * weight
+                          for metric, weight in type_weights.items())
+            for dlt_name in catalog.dlt_classification if dlt_name in catalog.dlt_metrics
+        }
+        _scoring_cache.set(key, scores)
+    return scores
+
+def get_ranked_recommendations(answers, k=10, offset=0, weights=None):
+    """Return one page of the catalog ranked for answers.
+
+    DLTs of the required type rank first, each group by descending score under
+    that type's weights, so rank 1 is the DLT get_recommendation selects. Only
+    the top offset + k entries are selected, with a heap, so pages stay cheap on
+    large catalogs. Each item carries its margin over the next-ranked DLT, and
+    'runner_up_gap' is the score lead of rank 1 over rank 2; both are negative
+    where a DLT outside the required type outscores the one ranked above it.
+    """
+    if not answers:
+        return {'dlt_type': "Não disponível", 'total': 0, 'offset': offset,
+                'items': [], 'runner_up_gap': None}
+    catalog = get_catalog()
+    dlt_classification = catalog.dlt_classification
+    required_type = get_dlt_type_requirements(answers)
+    scores = score_catalog(required_type, weights, catalog)
+
+    def rank_key(item):
+        dlt_name, score = item
+        return (dlt_classification[dlt_name]['type'] == required_type, score)
+
+    # One extra entry so the last item of the page also gets its margin
+    top = heapq.nlargest(max(offset + k + 1, 2), scores.items(), key=rank_key)
+    items = []
+    for rank in range(offset, min(offset + k, len(top))):
+        dlt_name, score = top[rank]
+        items.append({
+            'rank': rank + 1,
+            'dlt': dlt_name,
+            'type': dlt_classification[dlt_name]['type'],
+            'matches_type': dlt_classification[dlt_name]['type'] == required_type,
+            'score': score,
+            'margin': score - top[rank + 1][1] if rank + 1 < len(top) else None
+        })
+    return {
+        'dlt_type': required_type,
+        'total': len(scores),
+        'offset': offset,
+        'items': items,
+        'runner_up_gap': top[0][1] - top[1][1] if len(top) > 1 else None
     }
+
+def get_recommendation(answers, weights=None):
+    """Get DLT and consensus algorithm recommendations based on user answers.
+
+    Results are memoized on the catalog hash and the canonical answers and
+    weights and shared between sessions, so callers must treat the returned
+    dict as read-only.
+    """
+    if not answers:
+        return _unavailable_recommendation()
+    catalog = get_catalog()
+    if weights is None:
+        weights = catalog.dlt_type_weights
     
-    if answers.get('privacy') == 'Sim':
-        type_scores['DLT Permissionada Privada'] += 2
-        type_scores['DLT Híbrida'] += 1
-    
-    if answers.get('integration') == 'Sim':
-        type_scores['DLT Híbrida'] += 2
-        type_scores['DLT com Consenso Delegado'] += 1
+    key = ('recommendation', catalog.content_hash, _canonical(answers), _canonical(weights))
+    recommendation = _scoring_cache.get(key)
+    if recommendation is not None:
+        return recommendation
     
-    if answers.get('scalability') == 'Sim':
-        type_scores['DLT Pública Permissionless'] += 2
-        type_scores['DLT com Consenso Delegado'] += 1
+    try:
+        recommendation = _compute_recommendation(answers, weights, catalog)
+    except Exception as e:
+        print(f"Error in get_recommendation: {str(e)}")
+        return _unavailable_recommendation()
     
-    if answers.get('network_security') == 'Sim':
-        type_scores['DLT Pública'] += 2
-        type_scores['DLT Permissionada Privada'] += 1
+    _scoring_cache.set(key, recommendation)
+    return recommendation
+
+def _compute_recommendation(answers, weights, catalog):
+    # First, determine the required DLT type
+    required_type = get_dlt_type_requirements(answers)
     
-    return max(type_scores.items(), key=lambda x: x[1])[0]
+    # Calculate scores for candidate DLTs of that type
+    return _build_recommendation(score_candidates(required_type, weights, catalog), catalog)
 
-def get_recommendation(answers):
-    """Get DLT and consensus algorithm recommendations based on user answers."""
-    if not answers:
-        return {
-            "dlt": "Não disponível",
-            "dlt_type": "Não disponível",
-            "data_structure": "Não disponível",
-            "group": "Não disponível",
-            "algorithms": [],
-            "evaluation_matrix": {},
-            "metrics": {},
-            "details": {}
+def _build_recommendation(scores, catalog):
+    dlt_classification = catalog.dlt_classification
+    dlt_metrics = catalog.dlt_metrics
+    evaluation_matrix = {}
+    for dlt_name, score in scores.items():
+        dlt_info = dlt_classification[dlt_name]
+        evaluation_matrix[dlt_name] = {
+            'type': dlt_info['type'],
+            'data_structure': dlt_info['data_structure'],
+            'group': dlt_info['group'],
+            'algorithms': dlt_info['algorithms'],
+            'metrics': dlt_metrics[dlt_name]['metrics'],
+            'score': score
         }
     
-    try:
-        # First, determine the required DLT type
-        required_type = get_dlt_type_requirements(answers)
-        
-        # Filter DLTs by type
-        candidates = {
-            name: info for name, info in dlt_classification.items()
-            if info['type'] == required_type
-        }
-        
-        # Calculate scores for candidate DLTs
-        scores = {}
-        evaluation_matrix = {}
-        for dlt_name, dlt_info in candidates.items():
-            if dlt_name in dlt_metrics:
-                metrics = dlt_metrics[dlt_name]['metrics']
-                score = sum(
-                    metrics[metric] * weight
-                    for metric, weight in dlt_type_weights[required_type].items()
-                )
-                scores[dlt_name] = score
-                evaluation_matrix[dlt_name] = {
-                    'type': dlt_info['type'],
-                    'data_structure': dlt_info['data_structure'],
-                    'group': dlt_info['group'],
-                    'algorithms': dlt_info['algorithms'],
-                    'metrics': metrics,
-                    'score': score
-                }
-        
-        # Normalize scores
-        normalized_scores = normalize_scores(scores)
-        
-        # Select DLT with highest score
-        if normalized_scores:
-            selected_dlt = max(normalized_scores.items(), key=lambda x: x[1])[0]
-            dlt_info = dlt_classification[selected_dlt]
-            
-            return {
-                "dlt": selected_dlt,
-                "dlt_type": dlt_info['type'],
-                "data_structure": dlt_info['data_structure'],
-                "group": dlt_info['group'],
-                "algorithms": dlt_info['algorithms'],
-                "evaluation_matrix": evaluation_matrix,
-                "metrics": dlt_metrics[selected_dlt]['metrics'],
-                "details": {
-                    "use_cases": dlt_info['use_cases'],
-                    "challenges": dlt_info['challenges'],
-                    "references": dlt_info['references'],
-                    "real_cases": dlt_info['real_cases']
-                }
-            }
-        
-        return {
-            "dlt": "Não disponível",
-            "dlt_type": "Não disponível",
-            "data_structure": "Não disponível",
-            "group": "Não disponível",
-            "algorithms": [],
-            "evaluation_matrix": {},
-            "metrics": {},
-            "details": {}
-        }
+    # Normalize scores
+    normalized_scores = normalize_scores(scores)
+    
+    # Select DLT with highest score
+    if normalized_scores:
+        selected_dlt = max(normalized_scores.items(), key=lambda x: x[1])[0]
+        dlt_info = dlt_classification[selected_dlt]
         
-    except Exception as e:
-        print(f"Error in get_recommendation: {str(e)}")
         return {
-            "dlt": "Não disponível",
-            "dlt_type": "Não disponível",
-            "data_structure": "Não disponível",
-            "group": "Não disponível",
-            "algorithms": [],
-            "evaluation_matrix": {},
-            "metrics": {},
-            "details": {}
+            "dlt": selected_dlt,
+            "dlt_type": dlt_info['type'],
+            "data_structure": dlt_info['data_structure'],
+            "group": dlt_info['group'],
+            "algorithms": dlt_info['algorithms'],
+            "evaluation_matrix": evaluation_matrix,
+            "metrics": dlt_metrics[selected_dlt]['metrics'],
+            "details": {
+                "use_cases": dlt_info['use_cases'],
+                "challenges": dlt_info['challenges'],
+                "references": dlt_info['references'],
+                "real_cases": dlt_info['real_cases']
+            }
         }
+    
+    return _unavailable_recommendation()
+
+class IncrementalScorer:
+    """Recommendation state updated by deltas as individual answers change.
+
+    Keeps the running rule points of every DLT type and the candidate scores
+    and recommendation of each type already visited, so changing one answer
+    only adds or removes that question's points and re-selects the type.
+    """
+
+    def __init__(self, answers=None, weights=None):
+        # None follows the current catalog's weights
+        self.weights = weights
+        self.answers = {}
+        self.type_scores = dict.fromkeys(DLT_TYPES, 0)
+        self._recommendations = {}
+        for question_id, value in (answers or {}).items():
+            self.set_answer(question_id, value)
+
+    def set_answer(self, question_id, value):
+        """Record one answer and apply its rule points delta."""
+        delta = (value == 'Sim') - (self.answers.get(question_id) == 'Sim')
+        self.answers[question_id] = value
+        if delta:
+            for dlt_type, points in TYPE_RULES.get(question_id, {}).items():
+                self.type_scores[dlt_type] += delta * points
+
+    @property
+    def required_type(self):
+        return _select_type(self.type_scores)
+
+    def recommendation(self):
+        """Return the recommendation for the current answers, reusing per-type results."""
+        if not self.answers:
+            return _unavailable_recommendation()
+        catalog = get_catalog()
+        key = (catalog.content_hash, self.required_type)
+        if key not in self._recommendations:
+            try:
+                recommendation = _build_recommendation(
+                    score_candidates(self.required_type, self.weights, catalog), catalog)
+            except Exception as e:
+                print(f"Error in IncrementalScorer: {str(e)}")
+                return _unavailable_recommendation()
+            if any(k[0] != catalog.content_hash for k in self._recommendations):
+                self._recommendations.clear()
+            self._recommendations[key] = recommendation
+        return self._recommendations[key]
@@ -1,10 +1,19 @@
+import os
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 from dlt_data import questions
-from decision_logic import get_recommendation
-from database import save_recommendation
+from decision_logic import get_recommendation, get_ranked_recommendations, IncrementalScorer
+from storage import get_storage
+from attribution import explain_recommendation
+from what_if import METRIC_LABELS
+from figure_export import show_figure
+
+QUESTIONNAIRE_MODES = ["Passo a passo", "Formulário único"]
+
+# Build and send the matrix charts only once their section is opened; 0 renders them inside expanders
+DEFERRED_CHARTS = os.environ.get('DEFERRED_CHARTS', '1') != '0'
 
 def create_progress_animation(current_phase, answers, questions):
     """Create an animated progress visualization with enhanced interactivity."""
@@ -256,6 +265,67 @@ def create_consensus_algorithms_matrix():
     )
     return fig
 
+RANKING_PAGE_SIZE = 5
+
+def show_ranking(answers):
+    """Display the ranked catalog for answers one page at a time."""
+    total = get_ranked_recommendations(answers, k=0)['total']
+    pages = max(1, -(-total // RANKING_PAGE_SIZE))
+    page = st.number_input("Página", min_value=1, max_value=pages, value=1, key="ranking_page")
+    ranking = get_ranked_recommendations(answers, k=RANKING_PAGE_SIZE, offset=(page - 1) * RANKING_PAGE_SIZE)
+    if not ranking['items']:
+        st.write("Nenhuma DLT para classificar.")
+        return
+    ranking_df = pd.DataFrame([{
+        'Posição': item['rank'],
+        'DLT': item['dlt'],
+        'Tipo': item['type'],
+        'Tipo Requerido': 'Sim' if item['matches_type'] else 'Não',
+        'Pontuação': item['score'],
+        'Margem para a Próxima': item['margin']
+    } for item in ranking['items']]).set_index('Posição')
+    st.dataframe(ranking_df)
+    caption = f"Todas as DLTs pontuadas com os pesos de {ranking['dlt_type']}."
+    if ranking['runner_up_gap'] is not None:
+        caption += f" Vantagem da recomendada sobre a segunda colocada: {ranking['runner_up_gap']:+.3f}"
+    st.caption(caption)
+
+def show_score_breakdown(answers):
+    """Display how each answer and each metric contributed to the DLT scores."""
+    breakdown = explain_recommendation(answers)
+    question_texts = {q['id']: q['text'] for q in questions}
+
+    st.subheader("Contribuição de Cada Resposta")
+    contributions = pd.DataFrame(breakdown['questions']).rename(index=question_texts)
+    contributions = contributions.loc[:, (contributions != 0).any()]
+    if contributions.empty:
+        st.write("Com todas as respostas \"Não\", as pontuações são as do cenário base.")
+    else:
+        st.dataframe(contributions.style.format("{:+.3f}"))
+    st.caption("Contribuição média de cada resposta \"Sim\" em relação ao cenário com todas as respostas \"Não\" "
+               "(valores de Shapley).")
+
+    st.subheader(f"Contribuição de Cada Métrica ({breakdown['dlt_type']})")
+    metrics = pd.DataFrame(breakdown['metrics']).T.rename(columns=METRIC_LABELS)
+    metrics['Total'] = metrics.sum(axis=1)
+    st.dataframe(metrics.style.format("{:.3f}"))
+
+def show_chart_section(title, build_figure, description, key):
+    """Display a collapsible chart section.
+
+    With DEFERRED_CHARTS the section is a toggle and build_figure only runs
+    while it is on; st.expander always renders its contents, closed or not.
+    """
+    if DEFERRED_CHARTS:
+        if st.toggle(title, key=key):
+            with st.container(border=True):
+                show_figure(build_figure(), key, use_container_width=True)
+                st.write(description)
+        return
+    with st.expander(title):
+        show_figure(build_figure(), key, use_container_width=True)
+        st.write(description)
+
 def create_evaluation_matrices(recommendation):
     """Create and display evaluation matrices with hierarchical relationships."""
     if not recommendation or recommendation['dlt'] == "Não disponível":
@@ -284,26 +354,26 @@ def create_evaluation_matrices(recommendation):
                 st.write("O índice de consistência indica o quão bem a DLT atende aos requisitos de forma balanceada.")
                 st.write("Valores mais próximos de 1 indicam maior consistência.")
 
-    with st.expander("Matriz de Tipos de DLT"):
-        st.plotly_chart(create_dlt_types_matrix(), use_container_width=True)
-        st.write("""
+    show_chart_section("Matriz de Tipos de DLT", create_dlt_types_matrix, """
         Esta matriz mostra as relações entre diferentes tipos de DLT e suas características principais.
         Cores mais escuras indicam maior adequação para cada característica.
-        """)
+        """, key='chart_dlt_types')
 
-    with st.expander("Matriz de Grupos de Algoritmos"):
-        st.plotly_chart(create_algorithm_groups_matrix(), use_container_width=True)
-        st.write("""
+    show_chart_section("Matriz de Grupos de Algoritmos", create_algorithm_groups_matrix, """
         Comparação entre diferentes grupos de algoritmos baseada em complexidade,
         desempenho e descentralização.
-        """)
+        """, key='chart_algorithm_groups')
 
-    with st.expander("Matriz de Algoritmos de Consenso"):
-        st.plotly_chart(create_consensus_algorithms_matrix(), use_container_width=True)
-        st.write("""
+    show_chart_section("Matriz de Algoritmos de Consenso", create_consensus_algorithms_matrix, """
         Características detalhadas de cada algoritmo de consenso,
         incluindo segurança, escalabilidade, eficiência energética e governança.
-        """)
+        """, key='chart_consensus_algorithms')
+
+    with st.expander("Ranking Completo"):
+        show_ranking(st.session_state.get('answers', {}))
+
+    with st.expander("Contribuição das Respostas e Métricas"):
+        show_score_breakdown(st.session_state.get('answers', {}))
 
     with st.expander("Casos de Uso"):
         st.write(recommendation['details']['use_cases'])
@@ -325,26 +395,143 @@ def create_evaluation_matrices(recommendation):
                     'dlt_type': recommendation.get('dlt_type', 'N/A'),
                     'group': recommendation.get('group', 'N/A')
                 }
-                save_recommendation(st.session_state.username, "Healthcare", save_data)
+                get_storage().save_recommendation(st.session_state.username, "Healthcare", save_data)
                 st.success("Recomendação salva com sucesso!")
             except Exception as e:
                 st.error(f"Erro ao salvar recomendação: {str(e)}")
     else:
         st.info("Faça login para salvar suas recomendações.")
 
+def reset_questionnaire_cost():
+    """Start a fresh CPU accounting window for the next questionnaire run."""
+    st.session_state.questionnaire_cost = {'reruns': 0, 'cpu_seconds': 0.0, 'finished': False}
+
+def record_questionnaire_rerun(cpu_seconds):
+    """Accumulate the CPU cost of one script rerun spent on the questionnaire page.
+
+    The window closes on the rerun that first renders the recommendation, so both
+    modes are charged for exactly one results render.
+    """
+    cost = st.session_state.get('questionnaire_cost')
+    if cost is None or cost['finished']:
+        return
+    cost['reruns'] += 1
+    cost['cpu_seconds'] += cpu_seconds
+    if st.session_state.get('results_rendered'):
+        cost['finished'] = True
+        if 'questionnaire_runs' not in st.session_state:
+            st.session_state.questionnaire_runs = []
+        st.session_state.questionnaire_runs.append({
+            'Modo': st.session_state.get('questionnaire_mode', QUESTIONNAIRE_MODES[0]),
+            'Execuções do Script': cost['reruns'],
+            'CPU (ms)': cost['cpu_seconds'] * 1000
+        })
+
+def show_questionnaire_cost():
+    """Display the measured server CPU per completed questionnaire for each mode."""
+    runs = st.session_state.get('questionnaire_runs')
+    if not runs:
+        return
+    with st.expander("Custo de Execução do Questionário"):
+        runs_df = pd.DataFrame(runs)
+        st.dataframe(runs_df)
+        summary = runs_df.groupby('Modo').mean(numeric_only=True)
+        st.write("Média por questionário concluído:")
+        st.dataframe(summary)
+        if len(summary) == len(QUESTIONNAIRE_MODES):
+            step_cpu = summary.loc[QUESTIONNAIRE_MODES[0], 'CPU (ms)']
+            form_cpu = summary.loc[QUESTIONNAIRE_MODES[1], 'CPU (ms)']
+            if step_cpu > 0:
+                st.metric("Redução de CPU no modo formulário", f"{1 - form_cpu / step_cpu:.0%}")
+
+def run_questionnaire_form():
+    """Collect every answer in a single st.form so the script reruns only on submit."""
+    placeholder = st.empty()
+    with placeholder.form("questionnaire_form"):
+        responses = {}
+        current_phase = None
+        for q in questions:
+            if q['phase'] != current_phase:
+                current_phase = q['phase']
+                st.subheader(f"Fase: {current_phase}")
+            responses[q['id']] = st.radio(
+                q['text'],
+                q['options'],
+                key=f"form_{q['id']}",
+                help=f"Característica: {q['characteristic']}"
+            )
+        submitted = st.form_submit_button("Obter Recomendação")
+
+    if submitted:
+        placeholder.empty()
+        st.session_state.answers = responses
+        st.session_state.current_recommendation = get_recommendation(responses)
+
+def show_answer_editor():
+    """Let the user toggle answers on the results page, rescoring incrementally."""
+    scorer = st.session_state.get('scorer')
+    if scorer is None or scorer.answers != st.session_state.answers:
+        # A new questionnaire was completed: start from its answers
+        scorer = st.session_state.scorer = IncrementalScorer(st.session_state.answers)
+        for q in questions:
+            st.session_state.pop(f"edit_{q['id']}", None)
+
+    with st.expander("Alterar Respostas"):
+        st.write("Altere qualquer resposta para ver imediatamente como a recomendação muda.")
+        for q in questions:
+            value = st.radio(
+                q['text'],
+                q['options'],
+                index=q['options'].index(scorer.answers[q['id']]),
+                key=f"edit_{q['id']}",
+                horizontal=True
+            )
+            if value != scorer.answers[q['id']]:
+                scorer.set_answer(q['id'], value)
+
+    st.session_state.answers = dict(scorer.answers)
+    st.session_state.current_recommendation = scorer.recommendation()
+
 def run_decision_tree():
     """Main function to run the decision tree interface with improved state management."""
     st.title("Framework de Seleção de DLT")
     
     if 'answers' not in st.session_state:
         st.session_state.answers = {}
+    if 'questionnaire_cost' not in st.session_state:
+        reset_questionnaire_cost()
+    st.session_state.results_rendered = False
     
     if st.button("Reiniciar", help="Clique para recomeçar o processo de seleção"):
         st.session_state.answers = {}
         if 'current_recommendation' in st.session_state:
             del st.session_state.current_recommendation
-        st.experimental_rerun()
+        reset_questionnaire_cost()
+        st.rerun()
+    
+    mode = st.radio(
+        "Modo do questionário",
+        QUESTIONNAIRE_MODES,
+        key="questionnaire_mode",
+        horizontal=True,
+        help="O formulário único envia todas as respostas de uma vez, sem recarregar a página a cada pergunta"
+    )
+    
+    if mode == QUESTIONNAIRE_MODES[1] and len(st.session_state.answers) < len(questions):
+        run_questionnaire_form()
+    else:
+        run_step_by_step_questionnaire()
     
+    if len(st.session_state.answers) == len(questions):
+        if 'current_recommendation' not in st.session_state:
+            st.session_state.current_recommendation = get_recommendation(st.session_state.answers)
+        show_answer_editor()
+        create_evaluation_matrices(st.session_state.current_recommendation)
+        st.session_state.results_rendered = True
+        show_questionnaire_cost()
+
+def run_step_by_step_questionnaire():
+    """Ask one question per rerun, advancing on each "Próxima Pergunta" click."""
     current_phase = None
     for q in questions:
         if q['id'] not in st.session_state.answers:
@@ -353,7 +540,7 @@ def run_decision_tree():
     
     if current_phase:
         progress_fig = create_progress_animation(current_phase, st.session_state.answers, questions)
-        st.plotly_chart(progress_fig, use_container_width=True)
+        show_figure(progress_fig, 'questionnaire_progress', use_container_width=True)
     
     current_question = None
     for q in questions:
@@ -374,9 +561,4 @@ def run_decision_tree():
             st.session_state.answers[current_question['id']] = response
             if len(st.session_state.answers) == len(questions):
                 st.session_state.current_recommendation = get_recommendation(st.session_state.answers)
-            st.experimental_rerun()
-    
-    if len(st.session_state.answers) == len(questions):
-        if 'current_recommendation' not in st.session_state:
-            st.session_state.current_recommendation = get_recommendation(st.session_state.answers)
-        create_evaluation_matrices(st.session_state.current_recommendation)
\ No newline at end of file
+            st.rerun()
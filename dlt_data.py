@@ -1,27 +1,13 @@
-# DLT metrics and weights for healthcare applications
-dlt_metrics = {
-    "Hyperledger Fabric": {"type": "DLT Permissionada Privada", "metrics": {"security": 0.85, "scalability": 0.65, "energy_efficiency": 0.80, "governance": 0.75}},
-    "Corda": {"type": "DLT Permissionada Simples", "metrics": {"security": 0.70, "scalability": 0.55, "energy_efficiency": 0.75, "governance": 0.80}},
-    "Quorum": {"type": "DLT Híbrida", "metrics": {"security": 0.78, "scalability": 0.70, "energy_efficiency": 0.80, "governance": 0.78}},
-    "VeChain": {"type": "DLT Híbrida", "metrics": {"security": 0.75, "scalability": 0.80, "energy_efficiency": 0.85, "governance": 0.70}},
-    "IOTA": {"type": "DLT Pública (DAG)", "metrics": {"security": 0.80, "scalability": 0.85, "energy_efficiency": 0.90, "governance": 0.60}},
-    "Ripple": {"type": "DLT com Consenso Delegado", "metrics": {"security": 0.78, "scalability": 0.88, "energy_efficiency": 0.70, "governance": 0.80}},
-    "Stellar": {"type": "DLT com Consenso Delegado", "metrics": {"security": 0.75, "scalability": 0.82, "energy_efficiency": 0.70, "governance": 0.85}},
-    "Bitcoin": {"type": "DLT Pública", "metrics": {"security": 0.95, "scalability": 0.40, "energy_efficiency": 0.35, "governance": 0.50}},
-    "Ethereum (PoW)": {"type": "DLT Pública", "metrics": {"security": 0.90, "scalability": 0.50, "energy_efficiency": 0.40, "governance": 0.60}},
-    "Ethereum 2.0": {"type": "DLT Pública Permissionless", "metrics": {"security": 0.85, "scalability": 0.75, "energy_efficiency": 0.65, "governance": 0.80}}
-}
+# DLT metrics and per-type weights now live in the external catalog (see catalog.py)
+_CATALOG_ATTRIBUTES = ('dlt_metrics', 'dlt_type_weights')
 
-# Dynamic weights based on DLT type
-dlt_type_weights = {
-    "DLT Permissionada Privada": {"security": 0.35, "scalability": 0.20, "energy_efficiency": 0.20, "governance": 0.25},
-    "DLT Permissionada Simples": {"security": 0.30, "scalability": 0.25, "energy_efficiency": 0.25, "governance": 0.20},
-    "DLT Híbrida": {"security": 0.25, "scalability": 0.30, "energy_efficiency": 0.25, "governance": 0.20},
-    "DLT com Consenso Delegado": {"security": 0.25, "scalability": 0.35, "energy_efficiency": 0.25, "governance": 0.15},
-    "DLT Pública": {"security": 0.40, "scalability": 0.20, "energy_efficiency": 0.15, "governance": 0.25},
-    "DLT Pública (DAG)": {"security": 0.30, "scalability": 0.35, "energy_efficiency": 0.20, "governance": 0.15},
-    "DLT Pública Permissionless": {"security": 0.30, "scalability": 0.30, "energy_efficiency": 0.20, "governance": 0.20}
-}
+def __getattr__(name):
+    # Compatibility for dlt_data.dlt_metrics / dlt_data.dlt_type_weights: the
+    # current catalog's section. Read it per use; an imported name goes stale on reload.
+    if name in _CATALOG_ATTRIBUTES:
+        from catalog import get_catalog
+        return getattr(get_catalog(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Questions for determining DLT type and consensus algorithm
 questions = [
@@ -105,3 +91,166 @@ consensus_algorithms = {
     "Nominated Proof of Stake (NPoS)": "Variante de PoS usada em blockchains como o Polkadot, onde validadores são indicados por seus nominadores.",
     "Tangle": "Estrutura de consenso usada pela IOTA, especialmente para redes de IoT, oferecendo alta escalabilidade."
 }
+
+# Frameworks from the literature compared against SeletorDLTSaude
+frameworks_data = {
+    "Framework": [
+        "Framework Blockchain para EHRs Interoperáveis",
+        "Ferramenta de Suporte CREDO-DLT",
+        "Framework Medshare para Compartilhamento de Dados",
+        "TrialChain para Ensaios Clínicos",
+        "PharmaChain para Cadeia de Suprimentos",
+        "Framework Action-EHR para EHRs",
+        "MedRec para Gerenciamento de Registros Médicos",
+        "Scalability Challenges para Healthcare Blockchain",
+        "SeletorDLTSaude (Nosso Framework)",
+        "BLPCA-ledger: A lightweight plenum consensus",
+        "A critical literature review of security and privacy in smart home healthcare",
+        "Blockchain in healthcare: A comprehensive review",
+        "Blockchain Technology Applications in Healthcare Supply Chains"
+    ],
+    "Perguntas para Seleção": [
+        "1. Acesso imutável? 2. Alta segurança? 3. Controle robusto? 4. Privacidade? 5. Transparência?",
+        "1. Funcionalidade? 2. Segurança? 3. Desempenho? 4. Compliance com ITU?",
+        "1. Segurança dos dados? 2. Controle de acesso? 3. Privacidade? 4. Interoperabilidade?",
+        "1. Presença de terceiros confiáveis? 2. Alta segurança dos dados? 3. Controle de acesso? 4. Transparência?",
+        "1. Acesso imutável? 2. Segurança dos dados? 3. Frequência de atualização? 4. Transparência das transações?",
+        "1. Controle de acesso? 2. Segurança dos dados? 3. Interoperabilidade?",
+        "1. Segurança dos dados? 2. Eficiência no acesso? 3. Controle de permissão?",
+        "1. Escalabilidade? 2. Eficiência Energética? 3. Interoperabilidade?",
+        "1. Segurança? 2. Escalabilidade? 3. Eficiência Energética? 4. Governança? 5. Interoperabilidade?",
+        "1. Segurança? 2. Eficiência? 3. Privacidade?",
+        "1. Controle de acesso? 2. Proteção de dados pessoais?",
+        "1. Imutabilidade? 2. Conformidade regulatória? 3. Interoperabilidade?",
+        "1. Cadeia de suprimentos segura? 2. Rastreabilidade dos medicamentos?"
+    ],
+    "DLTs Possíveis": [
+        "DLT permissionada privada",
+        "Todas as plataformas DLT relevantes",
+        "Blockchain permissionada",
+        "DLT permissionada privada/pública",
+        "DLT permissionada pública",
+        "Hyperledger Fabric, Ethereum",
+        "Blockchain permissionada",
+        "Quorum, Ethereum",
+        "Múltiplas DLTs (Hyperledger Fabric, Ethereum, IOTA, etc.)",
+        "Hyperledger Indy",
+        "PoA Blockchain",
+        "Blockchain permissionada",
+        "Hyperledger Sawtooth"
+    ],
+    "Métricas de Avaliação": [
+        "Segurança, Privacidade, Transparência",
+        "Conformidade ITU, Funcionalidade, Desempenho",
+        "Segurança, Interoperabilidade, Privacidade",
+        "Segurança, Transparência, Controle de Acesso",
+        "Segurança, Transparência, Eficiência",
+        "Segurança, Interoperabilidade, Controle de Acesso",
+        "Segurança, Eficiência no Acesso, Controle de Permissão",
+        "Escalabilidade, Eficiência Energética, Interoperabilidade",
+        "Segurança, Escalabilidade, Eficiência, Governança, Interoperabilidade",
+        "Eficiência, Segurança, Privacidade, Escalabilidade",
+        "Privacidade, Segurança, Eficiência",
+        "Conformidade Regulamentar, Interoperabilidade, Segurança",
+        "Rastreabilidade, Segurança, Eficiência"
+    ],
+    "Referência": [
+        "DUBOVITSKAYA, A. et al. (2023)",
+        "AZARI, A. et al. (2023)",
+        "LI, K. et al. (2024)",
+        "WILLIAMS, N. et al. (2020)",
+        "JOHNSON, T. et al. (2021)",
+        "LI, Y. et al. (2019)",
+        "AZARIA, A. et al. (2016)",
+        "LI, K. et al. (2023)",
+        "SeletorDLTSaude (2024)",
+        "Mehmood, F. et al. (2025)",
+        "Popoola, O. et al. (2024)",
+        "Akoh Atadoga et al. (2024)",
+        "Dhingra, S. et al. (2024)"
+    ]
+}
+
+# Methodology of the compared frameworks
+methodology_data = {
+    'Framework': [
+        'SeletorDLTSaude', 
+        'CREDO-DLT', 
+        'MedRec', 
+        'TrialChain', 
+        'PharmaChain',
+        'BLPCA-ledger',
+        'Smart Home Healthcare',
+        'Healthcare Comprehensive Review',
+        'Healthcare Supply Chains'
+    ],
+    'Fases': [
+        '4 fases estruturadas', 
+        '3 fases', 
+        '1 fase', 
+        '2 fases', 
+        '2 fases', 
+        '3 fases com otimização', 
+        '1 fase com validações', 
+        'Revisão completa', 
+        '2 fases com rastreabilidade'
+    ],
+    'Métricas': [
+        'Múltiplas métricas', 
+        'Métricas ITU', 
+        'Métricas básicas', 
+        'Métricas customizadas', 
+        'Métricas padrão', 
+        'Métricas de consenso leve', 
+        'Privacidade e segurança IoT', 
+        'Segurança e conformidade', 
+        'Rastreabilidade e segurança'
+    ],
+    'Validação': [
+        'Acadêmica e prática', 
+        'Acadêmica', 
+        'Prática', 
+        'Acadêmica e prática', 
+        'Prática', 
+        'Simulação em larga escala', 
+        'Estudos de caso', 
+        'Revisão de literatura', 
+        'Validação prática com stakeholders'
+    ],
+    'Atualizações': [
+        'Contínuas', 
+        'Periódicas', 
+        'Limitadas', 
+        'Periódicas', 
+        'Periódicas', 
+        'Intermitentes', 
+        'Limitadas', 
+        'Atualização com novas pesquisas', 
+        'Periódicas e práticas'
+    ]
+}
+
+# Reference DLTs with their type, algorithm group and algorithm
+dlt_reference_data = {
+    'DLT': [
+        'Hyperledger Fabric', 'Corda', 'Quorum', 'VeChain', 'IOTA',
+        'Ripple', 'Stellar', 'Bitcoin', 'Ethereum (PoW)',
+        'Ethereum 2.0 (PoS)'
+    ],
+    'Tipo': [
+        'DLT Permissionada Privada', 'DLT Permissionada Simples', 'DLT Híbrida',
+        'DLT Híbrida', 'DLT Pública (DAG)', 'DLT com Consenso Delegado',
+        'DLT com Consenso Delegado', 'DLT Pública', 'DLT Pública',
+        'DLT Pública Permissionless'
+    ],
+    'Grupo de Algoritmo': [
+        'Alta Segurança', 'Alta Segurança', 'Escalabilidade',
+        'Alta Eficiência', 'Alta Escalabilidade', 'Alta Eficiência',
+        'Alta Eficiência', 'Alta Segurança', 'Alta Segurança',
+        'Escalabilidade'
+    ],
+    'Algoritmo': [
+        'RAFT/PBFT', 'RAFT', 'RAFT/IBFT', 'PoA', 'Tangle',
+        'RCA', 'SCP', 'PoW', 'PoW', 'PoS'
+    ]
+}
@@ -0,0 +1,98 @@
+"""CSV downloads generated incrementally and offered compressed.
+
+A DataFrame is written as CSV a few thousand rows at a time straight into a
+gzip or zip compressor, so the uncompressed CSV never exists as one object.
+Payloads are cached process-wide on the DataFrame's content hash: every
+session downloading the same data gets the same bytes object, built once.
+"""
+import hashlib
+import io
+import os
+import pickle
+import zipfile
+import zlib
+import pandas as pd
+import streamlit as st
+from ttl_cache import TTLCache
+from static_assets import get_download
+
+DOWNLOAD_CHUNK_ROWS = int(os.environ.get('DOWNLOAD_CHUNK_ROWS', 5000))
+DOWNLOAD_CACHE_MAX_BYTES = int(os.environ.get('DOWNLOAD_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# format -> (label, file extension appended to the CSV name, MIME type)
+DOWNLOAD_FORMATS = {
+    'gzip': ('CSV compactado (.gz)', '.gz', 'application/gzip'),
+    'zip': ('ZIP', '.zip', 'application/zip'),
+    'csv': ('CSV', '', 'text/csv')
+}
+
+_payload_cache = TTLCache(max_entries=64, max_bytes=DOWNLOAD_CACHE_MAX_BYTES)
+
+def dataframe_hash(df, index=True):
+    """Hash the columns and cell values of df (and its index when exported)."""
+    digest = hashlib.sha256(repr((list(df.columns), index)).encode('utf-8'))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=index).values.tobytes())
+    except TypeError:
+        # Unhashable cells such as lists
+        digest.update(pickle.dumps(df, pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()[:16]
+
+def iter_csv_chunks(df, index=True, chunk_rows=DOWNLOAD_CHUNK_ROWS):
+    """Yield df as UTF-8 CSV bytes, header first and then chunk_rows rows at a time."""
+    yield df.iloc[:0].to_csv(index=index).encode('utf-8')
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=index, header=False).encode('utf-8')
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    parts = [compressor.compress(chunk) for chunk in chunks]
+    parts.append(compressor.flush())
+    return b''.join(parts)
+
+def _zip(chunks, arcname):
+    out = io.BytesIO()
+    # Fixed timestamp so equal data always yields identical archives
+    info = zipfile.ZipInfo(arcname, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(out, 'w') as archive:
+        with archive.open(info, 'w') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    return out.getvalue()
+
+def build_payload(df, fmt, file_name, index=True):
+    """Encode df as the CSV file_name in fmt without caching."""
+    chunks = iter_csv_chunks(df, index)
+    if fmt == 'gzip':
+        return _gzip(chunks)
+    if fmt == 'zip':
+        return _zip(chunks, file_name)
+    return b''.join(chunks)
+
+def dataframe_payload(df, fmt='csv', file_name='dados.csv', index=True):
+    """Return the download bytes of df in fmt, shared by every caller with the same data."""
+    key = (dataframe_hash(df, index), fmt, file_name)
+    payload = _payload_cache.get(key)
+    if payload is None:
+        payload = build_payload(df, fmt, file_name, index)
+        _payload_cache.set(key, payload)
+    return payload
+
+def download_name(file_name, fmt):
+    return file_name + DOWNLOAD_FORMATS[fmt][1]
+
+def get_download_cache_stats():
+    return _payload_cache.stats()
+
+def show_dataframe_download(label, df, file_name, key, index=True):
+    """Display a format choice and a download button for df.
+
+    Prebuilt static artifacts named after the downloaded file are used when
+    they exist.
+    """
+    fmt = st.radio("Formato", list(DOWNLOAD_FORMATS), format_func=lambda f: DOWNLOAD_FORMATS[f][0],
+                   horizontal=True, key=f"{key}_format")
+    name = download_name(file_name, fmt)
+    payload = get_download(name, lambda: dataframe_payload(df, fmt, file_name, index))
+    st.download_button(label, payload, name, DOWNLOAD_FORMATS[fmt][2], key=key)
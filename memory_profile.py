@@ -0,0 +1,146 @@
+"""Opt-in per-page memory profiling with tracemalloc.
+
+While profiling is on (MEMORY_PROFILING=1 at startup, or switched on from
+the administration page) every page render is wrapped in profile_page: a
+snapshot is taken before and after the render and the allocation sites whose
+memory is still alive afterwards are accumulated per page, along with the
+traced total after each render so growth across reruns is visible. Snapshots
+cover the whole process, so renders of concurrent sessions overlap; profile
+on a quiet worker for clean attributions. Tracing slows every allocation
+down, so leave it off in normal operation.
+"""
+import contextlib
+import datetime
+import io
+import os
+import threading
+import tracemalloc
+from collections import Counter
+
+MEMORY_PROFILING_FRAMES = int(os.environ.get('MEMORY_PROFILING_FRAMES', 1))
+# Renders kept per page for the traced-total history
+MEMORY_HISTORY_SIZE = 100
+
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+]
+
+_lock = threading.Lock()
+_pages = {}
+# Profiled renders in progress; tracing is only stopped once none is left,
+# since take_snapshot raises after tracemalloc.stop()
+_active_renders = 0
+_stop_pending = False
+
+def start_profiling(frames=None):
+    global _stop_pending
+    with _lock:
+        _stop_pending = False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or MEMORY_PROFILING_FRAMES)
+
+def stop_profiling():
+    """Stop tracing now, or when the last profiled render in progress finishes."""
+    global _stop_pending
+    with _lock:
+        if _active_renders:
+            _stop_pending = True
+        else:
+            tracemalloc.stop()
+
+def is_profiling():
+    return tracemalloc.is_tracing() and not _stop_pending
+
+def reset_profiles():
+    with _lock:
+        _pages.clear()
+
+def _site(stat):
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+@contextlib.contextmanager
+def profile_page(page):
+    """Record the memory a render of page leaves allocated; a no-op when not profiling."""
+    global _active_renders, _stop_pending
+    with _lock:
+        profiling = is_profiling()
+        if profiling:
+            _active_renders += 1
+    if not profiling:
+        yield
+        return
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        try:
+            yield
+        finally:
+            _record(page, before)
+    finally:
+        with _lock:
+            _active_renders -= 1
+            if _stop_pending and not _active_renders:
+                tracemalloc.stop()
+                _stop_pending = False
+
+def _record(page, before):
+    after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    diff = after.compare_to(before, 'lineno')
+    traced, peak = tracemalloc.get_traced_memory()
+    with _lock:
+        profile = _pages.setdefault(page, {
+            'renders': 0, 'sizes': Counter(), 'counts': Counter(), 'history': []
+        })
+        profile['renders'] += 1
+        for stat in diff:
+            if stat.size_diff:
+                profile['sizes'][_site(stat)] += stat.size_diff
+                profile['counts'][_site(stat)] += stat.count_diff
+        profile['history'].append({
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'traced_kb': traced / 1024,
+            'peak_kb': peak / 1024,
+            'render_kb': sum(stat.size_diff for stat in diff) / 1024
+        })
+        del profile['history'][:-MEMORY_HISTORY_SIZE]
+
+def get_profiled_pages():
+    with _lock:
+        return sorted(_pages)
+
+def get_top_allocations(page, limit=15):
+    """Return the allocation sites that retained most memory across renders of page."""
+    with _lock:
+        profile = _pages.get(page)
+        if profile is None:
+            return []
+        return [{'site': site, 'size_kb': size / 1024, 'blocks': profile['counts'][site],
+                 'per_render_kb': size / 1024 / profile['renders']}
+                for site, size in profile['sizes'].most_common(limit)]
+
+def get_page_history(page):
+    """Return the traced memory after each profiled render of page, oldest first."""
+    with _lock:
+        profile = _pages.get(page)
+        return list(profile['history']) if profile else []
+
+def build_memory_report(limit=15):
+    """Return a plain-text report of every profiled page for download."""
+    out = io.StringIO()
+    out.write(f"Relatório de memória - {datetime.datetime.now().isoformat(timespec='seconds')}\n")
+    for page in get_profiled_pages():
+        history = get_page_history(page)
+        with _lock:
+            renders = _pages[page]['renders']
+        out.write(f"\n== {page} ({renders} renderizações) ==\n")
+        if history:
+            out.write(f"Memória rastreada: {history[0]['traced_kb']:.1f} KB -> {history[-1]['traced_kb']:.1f} KB\n")
+        for row in get_top_allocations(page, limit):
+            out.write(f"{row['size_kb']:>12.1f} KB {row['blocks']:>9} blocos  {row['site']}\n")
+    return out.getvalue()
+
+if os.environ.get('MEMORY_PROFILING') == '1':
+    start_profiling()
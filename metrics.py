@@ -5,6 +5,9 @@ import plotly.express as px
 import streamlit as st
 import pandas as pd
 from decision_logic import get_recommendation
+from static_assets import get_figure
+from downloads import show_dataframe_download
+from figure_export import show_figure
 
 def calcular_gini(classes):
     """Calcula a impureza de Gini para um conjunto de classes."""
@@ -23,6 +26,109 @@ def calcular_entropia(classes):
                    for count in classes.values() if count > 0)
     return entropia
 
+def calcular_ganho_informacao(classes, divisoes):
+    """Calcula o ganho de informação ao dividir classes nos subconjuntos divisoes."""
+    if not classes or sum(classes.values()) == 0:
+        return 0
+    total = sum(classes.values())
+    return calcular_entropia(classes) - sum(
+        sum(divisao.values()) / total * calcular_entropia(divisao) for divisao in divisoes
+    )
+
+def _somar_colunas(valores):
+    # Soma da esquerda para a direita, na mesma ordem do sum() das funções escalares,
+    # para que os resultados em lote sejam idênticos bit a bit
+    total = np.zeros(valores.shape[:-1])
+    for j in range(valores.shape[-1]):
+        total = total + valores[..., j]
+    return total
+
+def _log2_exato(valores):
+    # np.log2 pode divergir de math.log2 no último bit; aplica math.log2 aos valores distintos
+    unicos, inverso = np.unique(valores, return_inverse=True)
+    return np.fromiter(map(math.log2, unicos), float, len(unicos))[inverso].reshape(valores.shape)
+
+def _quadrado_exato(valores):
+    # p ** 2 no NumPy calcula p * p, que pode divergir no último bit do
+    # (count / total) ** 2 escalar (pow da libm); aplica ** 2 aos valores distintos
+    unicos, inverso = np.unique(valores, return_inverse=True)
+    return np.fromiter((v ** 2 for v in unicos.tolist()), float, len(unicos))[inverso].reshape(valores.shape)
+
+def _impurezas(contagens):
+    """Totais, Gini e entropia de cada distribuição no último eixo de contagens."""
+    contagens = np.asarray(contagens, dtype=float)
+    totais = _somar_colunas(contagens)
+    vazias = totais == 0
+    p = contagens / np.where(vazias, 1, totais)[..., None]
+    gini = np.where(vazias, 0.0, 1 - _somar_colunas(_quadrado_exato(p)))
+    positivas = contagens > 0
+    termos = np.where(positivas, p * _log2_exato(np.where(positivas, p, 1.0)), 0.0)
+    entropia = np.where(vazias, 0.0, -_somar_colunas(termos))
+    return totais, gini, entropia
+
+def calcular_impurezas_lote(contagens, divisoes=None):
+    """Calcula Gini, entropia e ganho de informação de várias distribuições de uma vez.
+
+    contagens é uma matriz (n, k) com uma distribuição de classes por linha;
+    divisoes, opcional, é um array (n, m, k) com as contagens dos m subconjuntos
+    em que cada linha é dividida. Os resultados são idênticos aos de
+    calcular_gini, calcular_entropia e calcular_ganho_informacao aplicados linha a linha.
+    """
+    contagens = np.asarray(contagens, dtype=float)
+    if contagens.ndim != 2:
+        raise ValueError("contagens deve ser uma matriz (n, k)")
+    totais, gini, entropia = _impurezas(contagens)
+    resultado = {'gini': gini, 'entropia': entropia}
+    if divisoes is not None:
+        divisoes = np.asarray(divisoes, dtype=float)
+        if divisoes.ndim != 3 or divisoes.shape[0] != contagens.shape[0]:
+            raise ValueError("divisoes deve ser um array (n, m, k) com as mesmas n linhas de contagens")
+        totais_divisoes, _, entropia_divisoes = _impurezas(divisoes)
+        pesos = totais_divisoes / np.where(totais == 0, 1, totais)[:, None]
+        resultado['ganho_informacao'] = np.where(
+            totais == 0, 0.0, entropia - _somar_colunas(pesos * entropia_divisoes)
+        )
+    return resultado
+
+def calcular_gini_lote(contagens):
+    """Calcula a impureza de Gini de cada linha de uma matriz de contagens (n, k)."""
+    return calcular_impurezas_lote(contagens)['gini']
+
+def calcular_entropia_lote(contagens):
+    """Calcula a entropia de Shannon de cada linha de uma matriz de contagens (n, k)."""
+    return calcular_impurezas_lote(contagens)['entropia']
+
+def calcular_ganho_informacao_lote(contagens, divisoes):
+    """Calcula o ganho de informação de cada linha dividida nos subconjuntos de divisoes (n, m, k)."""
+    return calcular_impurezas_lote(contagens, divisoes)['ganho_informacao']
+
+def verificar_paridade_lote(linhas=15000, classes=4, divisoes=3, semente=0):
+    """Compara as funções em lote com as escalares em contagens aleatórias inteiras e reais.
+
+    Levanta AssertionError na primeira linha cujo Gini, entropia ou ganho de
+    informação não seja idêntico bit a bit ao da função escalar.
+    """
+    rng = np.random.default_rng(semente)
+    for nome, contagens in [
+        ('inteiras', rng.integers(0, 20, size=(linhas, divisoes, classes)).astype(float)),
+        ('reais', rng.random((linhas, divisoes, classes)) * rng.integers(0, 2, size=(linhas, divisoes, classes)))
+    ]:
+        totais = contagens.sum(axis=1)
+        lote = calcular_impurezas_lote(totais, contagens)
+        for i in range(linhas):
+            classes_linha = dict(enumerate(totais[i].tolist()))
+            divisoes_linha = [dict(enumerate(d.tolist())) for d in contagens[i]]
+            esperado = {
+                'gini': calcular_gini(classes_linha),
+                'entropia': calcular_entropia(classes_linha),
+                'ganho_informacao': calcular_ganho_informacao(classes_linha, divisoes_linha)
+            }
+            for metrica, valor in esperado.items():
+                assert float(lote[metrica][i]) == valor, (
+                    f"{metrica} difere na linha {i} ({nome}): {totais[i].tolist()} -> "
+                    f"{float(lote[metrica][i])!r} != {valor!r}")
+    return True
+
 def calcular_profundidade_decisoria(decisoes):
     """Calcula a profundidade média da árvore de decisão e métricas relacionadas."""
     if not decisoes:
@@ -78,6 +184,58 @@ def create_metrics_visualization(metrics):
     
     return fig
 
+def create_gini_chart():
+    """Creates the class distribution pie chart behind the Gini index."""
+    gini_data = pd.DataFrame({
+        'Classe': ['DLT Permissionada', 'DLT Pública', 'DLT Híbrida'],
+        'Proporção': [3/7, 2/7, 2/7]
+    })
+    fig_gini = px.pie(gini_data, values='Proporção', names='Classe',
+                      title='Distribuição de Classes (Gini Index: 0.653)')
+    return fig_gini
+
+def create_entropy_chart():
+    """Creates the per-class entropy line chart."""
+    entropy_data = pd.DataFrame({
+        'Classe': ['DLT Permissionada', 'DLT Pública', 'DLT Híbrida'],
+        'Entropia': [-0.429 * np.log2(0.429),
+                    -0.286 * np.log2(0.286),
+                    -0.286 * np.log2(0.286)],
+        'Probabilidade': [0.429, 0.286, 0.286]
+    })
+    
+    fig_entropy = go.Figure()
+    
+    # Add line trace for entropy values
+    fig_entropy.add_trace(go.Scatter(
+        x=entropy_data['Classe'],
+        y=entropy_data['Entropia'],
+        mode='lines+markers',
+        name='Entropia',
+        line=dict(color='blue', width=2),
+        marker=dict(size=8)
+    ))
+    
+    # Add probability points for reference
+    fig_entropy.add_trace(go.Scatter(
+        x=entropy_data['Classe'],
+        y=entropy_data['Probabilidade'],
+        mode='markers',
+        name='Probabilidade',
+        marker=dict(size=8, color='red')
+    ))
+    
+    # Update layout
+    fig_entropy.update_layout(
+        title='Entropia por Classe (Total: 1.557)',
+        xaxis_title='Classe',
+        yaxis_title='Valor',
+        hovermode='x unified',
+        showlegend=True
+    )
+    
+    return fig_entropy
+
 def show_metrics():
     """Display metrics and analysis."""
     st.title("Métricas e Análise")
@@ -155,63 +313,17 @@ def show_metrics():
     # 2. Metrics Visualization
     st.subheader("2. Visualização das Métricas")
     metrics_fig = create_metrics_visualization(metrics)
-    st.plotly_chart(metrics_fig, use_container_width=True)
+    show_figure(metrics_fig, 'metrics_overview', use_container_width=True)
     
     # 3. Gini and Entropy Visualizations
     st.subheader("3. Distribuição e Entropia das Classes")
     col1, col2 = st.columns(2)
     
     with col1:
-        # Gini Index visualization
-        gini_data = pd.DataFrame({
-            'Classe': ['DLT Permissionada', 'DLT Pública', 'DLT Híbrida'],
-            'Proporção': [3/7, 2/7, 2/7]
-        })
-        fig_gini = px.pie(gini_data, values='Proporção', names='Classe',
-                          title='Distribuição de Classes (Gini Index: 0.653)')
-        st.plotly_chart(fig_gini)
+        show_figure(get_figure('gini_distribution', create_gini_chart), 'gini_distribution')
     
     with col2:
-        # Updated Entropy visualization using a line chart
-        entropy_data = pd.DataFrame({
-            'Classe': ['DLT Permissionada', 'DLT Pública', 'DLT Híbrida'],
-            'Entropia': [-0.429 * np.log2(0.429),
-                        -0.286 * np.log2(0.286),
-                        -0.286 * np.log2(0.286)],
-            'Probabilidade': [0.429, 0.286, 0.286]
-        })
-        
-        fig_entropy = go.Figure()
-        
-        # Add line trace for entropy values
-        fig_entropy.add_trace(go.Scatter(
-            x=entropy_data['Classe'],
-            y=entropy_data['Entropia'],
-            mode='lines+markers',
-            name='Entropia',
-            line=dict(color='blue', width=2),
-            marker=dict(size=8)
-        ))
-        
-        # Add probability points for reference
-        fig_entropy.add_trace(go.Scatter(
-            x=entropy_data['Classe'],
-            y=entropy_data['Probabilidade'],
-            mode='markers',
-            name='Probabilidade',
-            marker=dict(size=8, color='red')
-        ))
-        
-        # Update layout
-        fig_entropy.update_layout(
-            title='Entropia por Classe (Total: 1.557)',
-            xaxis_title='Classe',
-            yaxis_title='Valor',
-            hovermode='x unified',
-            showlegend=True
-        )
-        
-        st.plotly_chart(fig_entropy)
+        show_figure(get_figure('entropy_by_class', create_entropy_chart), 'entropy_by_class')
     
     # 4. Detailed Analysis
     st.subheader("4. Análise Detalhada das Métricas")
@@ -303,11 +415,10 @@ def show_metrics():
         ]
     })
     
-    csv = metrics_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        "Baixar Relatório Completo",
-        csv,
-        "metricas_detalhadas.csv",
-        "text/csv",
-        key='download-metrics'
-    )
+    show_dataframe_download("Baixar Relatório Completo", metrics_df, "metricas_detalhadas.csv",
+                            key='download-metrics', index=False)
+
+if __name__ == "__main__":
+    # python metrics.py: confere a paridade bit a bit das funções em lote com as escalares
+    verificar_paridade_lote()
+    print("Funções em lote idênticas às escalares")
@@ -0,0 +1,135 @@
+"""Latency log for the SQL statements the application runs.
+
+Connections opened with TimedConnection time every execute/executemany and
+aggregate the latencies per statement. Statements slower than
+SLOW_QUERY_THRESHOLD_MS are also kept in a bounded log together with the
+types and sizes of their parameters and their EXPLAIN QUERY PLAN, so full
+scans and temporary sorts show up before users notice. Parameter values are
+never logged: they may be password hashes or blobs of many megabytes.
+Timings cover the execute call, which for sorted or aggregated queries
+includes building the whole result; fetching further rows is not timed.
+Set SQL_QUERY_LOG=0 to turn the log off.
+"""
+import collections
+import datetime
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SQL_QUERY_LOG = os.environ.get('SQL_QUERY_LOG', '1') != '0'
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 50))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 200))
+# Longer statements are truncated in the slow log
+SLOW_QUERY_MAX_CHARS = int(os.environ.get('SLOW_QUERY_MAX_CHARS', 4096))
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+_lock = threading.Lock()
+_stats = {}
+_slow_queries = collections.deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """Collapse whitespace so the same statement always aggregates under one key."""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def describe_params(params):
+    """Summarize bound parameters as their types and lengths, e.g. 'blob(1048576)'."""
+    def describe(value):
+        if value is None:
+            return 'null'
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            return f"{'text' if isinstance(value, str) else 'blob'}({len(value)})"
+        return type(value).__name__
+    if isinstance(params, dict):
+        return ', '.join(f':{name} {describe(value)}' for name, value in params.items())
+    return ', '.join(describe(value) for value in params)
+
+def _null_params(params):
+    if isinstance(params, dict):
+        return dict.fromkeys(params)
+    return (None,) * len(params)
+
+def _explain(conn, sql, params):
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # NULLs instead of the real values: the plan does not depend on them and they may be huge
+        rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, _null_params(params)).fetchall()
+    except sqlite3.Error as e:
+        return [f"(plano indisponível: {e})"]
+    return [row[-1] for row in rows]
+
+def record_query(conn, sql, params, elapsed):
+    """Add one timed statement to the aggregates and, if slow, to the slow log."""
+    elapsed_ms = elapsed * 1000
+    key = normalize_sql(sql)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+    if elapsed_ms < SLOW_QUERY_THRESHOLD_MS:
+        return
+    logged_sql = key if len(key) <= SLOW_QUERY_MAX_CHARS else key[:SLOW_QUERY_MAX_CHARS] + '…'
+    entry = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'sql': logged_sql,
+        'params': describe_params(params)[:SLOW_QUERY_MAX_CHARS],
+        'ms': elapsed_ms,
+        'plan': _explain(conn, sql, params)
+    }
+    with _lock:
+        _slow_queries.append(entry)
+    print(f"Slow query ({elapsed_ms:.1f} ms): {logged_sql[:200]}")
+
+def get_query_stats(top=20, order_by='total_ms'):
+    """Return the top statements by order_by ('total_ms', 'max_ms' or 'count')."""
+    with _lock:
+        rows = [dict(stats, sql=sql, mean_ms=stats['total_ms'] / stats['count'])
+                for sql, stats in _stats.items()]
+    return sorted(rows, key=lambda r: r[order_by], reverse=True)[:top]
+
+def get_slow_queries():
+    """Return the logged slow statements, newest first."""
+    with _lock:
+        return list(reversed(_slow_queries))
+
+def reset_query_log():
+    with _lock:
+        _stats.clear()
+        _slow_queries.clear()
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query(self.connection, sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_query(self.connection, sql, (None,) * sql.count('?'), time.perf_counter() - start)
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory whose statements are recorded in the query log."""
+
+    def cursor(self, factory=None):
+        if factory is None and SQL_QUERY_LOG:
+            factory = TimedCursor
+        return super().cursor(factory) if factory else super().cursor()
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
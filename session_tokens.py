@@ -0,0 +1,119 @@
+"""Signed, expiring session tokens.
+
+A successful login issues a token "<payload>.<signature>" where the payload is
+the base64url JSON {"u": username, "iat": issue time, "exp": expiry,
+"jti": token id} and the signature its HMAC-SHA256 under the server secret.
+The token is kept in the page URL, so a browser refresh or reconnect restores the session with one
+HMAC and one revocation lookup instead of a bcrypt check and a user query.
+Logging out revokes the token server-side; changing the password revokes
+every token issued to the user before the change.
+
+The secret comes from SELETOR_SESSION_SECRET or, failing that, from a key
+file created on first use, so tokens survive restarts and deploys and are
+shared by every worker using the same directory. Secrets shorter than
+MIN_SECRET_BYTES are refused rather than used.
+
+Because the token sits in the URL (the "sessao" query parameter) it also
+ends up in browser history, proxy and server logs and Referer headers.
+Treat it as exposed: SESSION_TOKEN_TTL is kept short (2 hours by default),
+and logging out or changing the password revokes it.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import time
+from storage import get_storage
+
+SESSION_TOKEN_TTL = float(os.environ.get('SESSION_TOKEN_TTL', 2 * 3600))
+SESSION_SECRET_FILE = os.environ.get('SELETOR_SESSION_SECRET_FILE', 'seletordltsaude_session.key')
+
+MIN_SECRET_BYTES = 32
+
+_secret = None
+
+def _create_secret_file():
+    """Write a new key to a temporary file and link it into place unless a key already exists.
+
+    The key file only ever appears complete, so a worker starting at the same
+    time, or after a crash mid-write, can never read a partial or empty key.
+    """
+    directory = os.path.dirname(os.path.abspath(SESSION_SECRET_FILE))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(secrets.token_bytes(MIN_SECRET_BYTES))
+            f.flush()
+            os.fsync(f.fileno())
+        os.link(tmp_path, SESSION_SECRET_FILE)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+
+def _load_secret():
+    global _secret
+    if _secret is None:
+        env_secret = os.environ.get('SELETOR_SESSION_SECRET')
+        if env_secret:
+            secret = env_secret.encode('utf-8')
+        else:
+            if not os.path.exists(SESSION_SECRET_FILE):
+                _create_secret_file()
+            with open(SESSION_SECRET_FILE, 'rb') as f:
+                secret = f.read()
+        if len(secret) < MIN_SECRET_BYTES:
+            source = 'SELETOR_SESSION_SECRET' if env_secret else SESSION_SECRET_FILE
+            raise RuntimeError(f"Session secret from {source} is shorter than {MIN_SECRET_BYTES} bytes")
+        _secret = secret
+    return _secret
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _sign(payload):
+    return _b64encode(hmac.new(_load_secret(), payload.encode('ascii'), hashlib.sha256).digest())
+
+def issue_token(username, ttl=None):
+    """Return a new signed token for username valid for ttl seconds."""
+    now = time.time()
+    claims = {
+        'u': username,
+        'iat': now,
+        'exp': now + (SESSION_TOKEN_TTL if ttl is None else ttl),
+        'jti': secrets.token_urlsafe(16)
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f"{payload}.{_sign(payload)}"
+
+def _decode(token):
+    """Return the claims of a well-signed token, expired or not, or None."""
+    try:
+        payload, signature = token.split('.')
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        return json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+
+def verify_token(token):
+    """Return the username of a valid, unexpired and unrevoked token, or None."""
+    claims = _decode(token) if token else None
+    if claims is None or claims['exp'] < time.time():
+        return None
+    # Tokens issued before 'iat' existed count as issued at the epoch
+    if get_storage().is_session_token_revoked(claims['jti'], claims['u'], claims.get('iat', 0)):
+        return None
+    return claims['u']
+
+def revoke_token(token):
+    """Revoke token server-side until it would have expired."""
+    claims = _decode(token) if token else None
+    if claims is not None and claims['exp'] >= time.time():
+        get_storage().revoke_session_token(claims['jti'], claims['exp'])
@@ -0,0 +1,60 @@
+import json
+import os
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+
+STATIC_ASSETS_DIR = os.environ.get(
+    'STATIC_ASSETS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'static')
+)
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+@st.cache_resource
+def load_manifest():
+    """Load the manifest of the current asset build, or None when nothing was built."""
+    try:
+        with open(os.path.join(STATIC_ASSETS_DIR, CURRENT_FILE), encoding='utf-8') as f:
+            version = f.read().strip()
+        with open(os.path.join(STATIC_ASSETS_DIR, version, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    manifest['path'] = os.path.join(STATIC_ASSETS_DIR, version)
+    return manifest
+
+@st.cache_resource
+def _load_figure(path):
+    with open(path, encoding='utf-8') as f:
+        return pio.from_json(f.read(), skip_invalid=True)
+
+@st.cache_resource
+def _load_table(path):
+    return pd.read_pickle(path)
+
+@st.cache_resource
+def _load_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _artifact_path(kind, name):
+    manifest = load_manifest()
+    if manifest is None or name not in manifest.get(kind, {}):
+        return None
+    return os.path.join(manifest['path'], manifest[kind][name])
+
+def get_figure(name, builder):
+    """Return the prebuilt figure `name`, building it on the fly when no artifact exists."""
+    path = _artifact_path('figures', name)
+    return _load_figure(path) if path else builder()
+
+def get_table(name, builder):
+    """Return the prebuilt DataFrame `name`, building it on the fly when no artifact exists."""
+    path = _artifact_path('tables', name)
+    return _load_table(path) if path else builder()
+
+def get_download(name, builder):
+    """Return the prebuilt download payload `name`, building it on the fly when no artifact exists."""
+    path = _artifact_path('downloads', name)
+    return _load_bytes(path) if path else builder()
@@ -0,0 +1,236 @@
+"""Storage backends for users, recommendations and feedback.
+
+The backend is chosen with the SELETOR_STORAGE_BACKEND environment variable:
+"sqlite" (default) persists through database.py, "memory" keeps everything in
+process memory for tests, benchmarks and ephemeral demo deployments.
+
+Background jobs (jobs.py) are not part of the backend: their table and
+result files always live on disk under JOBS_DB_PATH and JOB_RESULTS_DIR,
+whichever backend is selected.
+"""
+import abc
+import datetime
+import itertools
+import json
+import os
+import time
+from collections import Counter
+
+class StorageBackend(abc.ABC):
+    """Interface every storage backend implements."""
+
+    @abc.abstractmethod
+    def create_user(self, username, hashed_password):
+        """Create a user; return False if the username is taken."""
+
+    @abc.abstractmethod
+    def get_user(self, username):
+        """Return the user record (with 'username' and 'password') or None."""
+
+    @abc.abstractmethod
+    def update_password(self, username, hashed_password):
+        """Replace the user's password hash and revoke the session tokens issued to them so far.
+
+        Return False if the user does not exist.
+        """
+
+    @abc.abstractmethod
+    def save_recommendation(self, username, scenario, recommendation):
+        """Store the recommendation given to username for scenario."""
+
+    @abc.abstractmethod
+    def get_user_recommendations(self, username):
+        """Return the user's five most recent recommendations, newest first."""
+
+    @abc.abstractmethod
+    def get_recommendation_rollups(self, granularity, dimension, since_bucket):
+        """Return (bucket, value, count) rows from since_bucket onwards, oldest first."""
+
+    @abc.abstractmethod
+    def save_feedback(self, username, scenario, dlt, consensus_group, feedback_data):
+        """Store username's feedback on the dlt recommended for scenario."""
+
+    @abc.abstractmethod
+    def count_feedback_aspect(self, dlt, aspect):
+        """Count distinct users who flagged aspect in their feedback for dlt."""
+
+    @abc.abstractmethod
+    def get_feedback_aspect_summary(self, dlt=None):
+        """Return (dlt, aspect, flags, users) rows, optionally for one DLT."""
+
+    @abc.abstractmethod
+    def revoke_session_token(self, token_id, expires_at):
+        """Reject the session token token_id until it expires at expires_at (epoch seconds)."""
+
+    @abc.abstractmethod
+    def is_session_token_revoked(self, token_id, username, issued_at):
+        """Whether token_id was revoked, or username's tokens issued at issued_at were."""
+
+class SQLiteBackend(StorageBackend):
+    """Backend persisting to the application SQLite database through database.py."""
+
+    def __init__(self):
+        # Imported here so the in-memory backend never creates the database file
+        import database
+        self.db = database
+
+    def create_user(self, username, hashed_password):
+        return self.db.create_user(username, hashed_password)
+
+    def get_user(self, username):
+        return self.db.get_user(username)
+
+    def update_password(self, username, hashed_password):
+        return self.db.update_password(username, hashed_password)
+
+    def save_recommendation(self, username, scenario, recommendation):
+        self.db.save_recommendation(username, scenario, recommendation)
+
+    def get_user_recommendations(self, username):
+        return self.db.get_user_recommendations(username)
+
+    def get_recommendation_rollups(self, granularity, dimension, since_bucket):
+        return self.db.get_recommendation_rollups(granularity, dimension, since_bucket)
+
+    def save_feedback(self, username, scenario, dlt, consensus_group, feedback_data):
+        self.db.save_feedback(username, scenario, dlt, consensus_group, feedback_data)
+
+    def count_feedback_aspect(self, dlt, aspect):
+        return self.db.count_feedback_aspect(dlt, aspect)
+
+    def get_feedback_aspect_summary(self, dlt=None):
+        return self.db.get_feedback_aspect_summary(dlt)
+
+    def revoke_session_token(self, token_id, expires_at):
+        self.db.revoke_session_token(token_id, expires_at)
+
+    def is_session_token_revoked(self, token_id, username, issued_at):
+        return self.db.is_session_token_revoked(token_id, username, issued_at)
+
+# Same rule as database._FEEDBACK_ASPECTS_INSERT
+_NOT_FLAGGED = (0, '', 'Não', 'não', 'false', False, None)
+
+class InMemoryBackend(StorageBackend):
+    """Process-local backend without locks.
+
+    Writes only use operations that are atomic under the GIL (dict.setdefault,
+    list.append, next() on itertools.count), so concurrent sessions never
+    block each other. Aggregates are computed on read.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._recommendations = []
+        self._feedback = []
+        self._revoked_tokens = {}
+        self._token_cutoffs = {}
+        self._ids = itertools.count(1)
+
+    def create_user(self, username, hashed_password):
+        record = {'username': username, 'password': hashed_password,
+                  'created_at': datetime.datetime.now().isoformat()}
+        return self._users.setdefault(username, record) is record
+
+    def get_user(self, username):
+        return self._users.get(username)
+
+    def update_password(self, username, hashed_password):
+        user = self._users.get(username)
+        if user is None:
+            return False
+        user['password'] = hashed_password
+        self._token_cutoffs[username] = time.time()
+        return True
+
+    def save_recommendation(self, username, scenario, recommendation):
+        self._recommendations.append({
+            'id': next(self._ids),
+            'username': username,
+            'scenario': scenario,
+            'dlt': recommendation['dlt'],
+            'consensus': recommendation['consensus'],
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+
+    def get_user_recommendations(self, username):
+        own = [r for r in self._recommendations if r['username'] == username]
+        return sorted(own, key=lambda r: r['timestamp'], reverse=True)[:5]
+
+    def get_recommendation_rollups(self, granularity, dimension, since_bucket):
+        counts = Counter()
+        for r in list(self._recommendations):
+            # Same bucketing and cohorts as database.save_recommendation
+            bucket = r['timestamp'][:13] + ':00' if granularity == 'hour' else r['timestamp'][:10]
+            if bucket < since_bucket:
+                continue
+            if dimension == 'cohort':
+                user = self._users.get(r['username'])
+                value = user['created_at'][:7] if user else 'Sem coorte'
+            else:
+                value = r[dimension]
+            counts[(bucket, value)] += 1
+        return [(bucket, value, count) for (bucket, value), count in sorted(counts.items())]
+
+    def save_feedback(self, username, scenario, dlt, consensus_group, feedback_data):
+        self._feedback.append({
+            'id': next(self._ids),
+            'username': username,
+            'scenario': scenario,
+            'dlt': dlt,
+            'consensus': consensus_group,
+            'rating': feedback_data['rating'],
+            'usefulness': feedback_data['usefulness'],
+            'comment': feedback_data['comment'],
+            'specific_aspects': json.dumps(feedback_data['specific_aspects']),
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+
+    def _flagged_aspects(self):
+        for f in list(self._feedback):
+            aspects = json.loads(f['specific_aspects'])
+            if isinstance(aspects, list):
+                aspects = {aspect: True for aspect in aspects}
+            for aspect, value in aspects.items():
+                if value not in _NOT_FLAGGED:
+                    yield f, aspect
+
+    def count_feedback_aspect(self, dlt, aspect):
+        return len({f['username'] for f, a in self._flagged_aspects() if f['dlt'] == dlt and a == aspect})
+
+    def get_feedback_aspect_summary(self, dlt=None):
+        flags = Counter()
+        users = {}
+        for f, aspect in self._flagged_aspects():
+            if dlt is None or f['dlt'] == dlt:
+                flags[(f['dlt'], aspect)] += 1
+                users.setdefault((f['dlt'], aspect), set()).add(f['username'])
+        return [(d, a, flags[(d, a)], len(users[(d, a)]))
+                for d, a in sorted(flags, key=lambda k: (k[0], -flags[k]))]
+
+    def revoke_session_token(self, token_id, expires_at):
+        self._revoked_tokens[token_id] = expires_at
+
+    def is_session_token_revoked(self, token_id, username, issued_at):
+        return token_id in self._revoked_tokens or issued_at <= self._token_cutoffs.get(username, float('-inf'))
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'memory': InMemoryBackend
+}
+
+_storage = None
+
+def get_storage():
+    """Return the process-wide backend selected by SELETOR_STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        name = os.environ.get('SELETOR_STORAGE_BACKEND', 'sqlite')
+        if name not in BACKENDS:
+            raise ValueError(f"Backend de armazenamento desconhecido: {name}")
+        _storage = BACKENDS[name]()
+    return _storage
+
+def set_storage(backend):
+    """Replace the process-wide backend, e.g. with a fresh InMemoryBackend in tests."""
+    global _storage
+    _storage = backend
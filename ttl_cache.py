@@ -0,0 +1,105 @@
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+def estimate_size(value):
+    """Approximate the memory footprint of a cached value in bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        # Measured directly: pickling would copy the whole payload
+        return len(value)
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+class TTLCache:
+    """Thread-safe LRU cache bounded by entry count, approximate bytes and entry age."""
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default when absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=_MISSING):
+        """Store value under key, evicting least recently used entries to stay in bounds.
+
+        ttl overrides the cache-wide entry age for this entry only.
+        """
+        size = estimate_size(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key=_MISSING):
+        """Drop one key, or every entry when called without arguments."""
+        with self._lock:
+            if key is _MISSING:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def stats(self):
+        """Return hit, miss and eviction counters plus current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,6 +1,10 @@
 import streamlit as st
 import bcrypt
-from database import create_user, get_user
+from storage import get_storage
+from session_tokens import issue_token, verify_token, revoke_token
+
+# Query parameter holding the signed session token
+SESSION_PARAM = 'sessao'
 
 def register():
     st.subheader("Criar uma Conta")
@@ -17,7 +21,7 @@ def register():
         else:
             # Hash da senha usando bcrypt
             hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-            if create_user(new_username, hashed_password):
+            if get_storage().create_user(new_username, hashed_password):
                 st.success("Conta criada com sucesso. Você pode fazer login agora.")
             else:
                 st.error("Nome de usuário já existe. Por favor, escolha um nome de usuário diferente.")
@@ -28,24 +32,64 @@ def login():
     password = st.text_input("Senha", type="password", key="login_password")
 
     if st.button("Entrar", key="login_button"):
-        user = get_user(username)
+        user = get_storage().get_user(username)
         # Verificação de nome de usuário e senha
         if user and bcrypt.checkpw(password.encode('utf-8'), user['password']):
             # Armazenando o estado de autenticação na sessão
             st.session_state.authenticated = True
             st.session_state.username = username
+            st.query_params[SESSION_PARAM] = issue_token(username)
             st.success("Login realizado com sucesso!")
-            st.experimental_rerun()
+            st.rerun()
         else:
             st.error("Nome de usuário ou senha inválidos")
 
+def change_password():
+    st.subheader("Alterar Senha")
+    current_password = st.text_input("Senha Atual", type="password", key="current_password")
+    new_password = st.text_input("Nova Senha", type="password", key="new_password")
+    confirm_password = st.text_input("Confirmar Nova Senha", type="password", key="confirm_new_password")
+
+    if st.button("Alterar Senha", key="change_password_button"):
+        storage = get_storage()
+        user = storage.get_user(st.session_state.username)
+        if not user or not bcrypt.checkpw(current_password.encode('utf-8'), user['password']):
+            st.error("Senha atual incorreta")
+        elif new_password != confirm_password:
+            st.error("As senhas não coincidem")
+        elif len(new_password) < 6:
+            st.error("A senha deve ter pelo menos 6 caracteres")
+        else:
+            hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+            # Also revokes every session token issued so far, including this one
+            storage.update_password(st.session_state.username, hashed_password)
+            st.query_params[SESSION_PARAM] = issue_token(st.session_state.username)
+            st.success("Senha alterada com sucesso.")
+
+def restore_session():
+    """Authenticate a new session from the signed token in the URL, if it is still valid."""
+    if st.session_state.get('authenticated'):
+        return
+    token = st.query_params.get(SESSION_PARAM)
+    if not token:
+        return
+    username = verify_token(token)
+    if username is None:
+        del st.query_params[SESSION_PARAM]
+        return
+    st.session_state.authenticated = True
+    st.session_state.username = username
+
 def is_authenticated():
     return st.session_state.get('authenticated', False)
 
 def logout():
+    if SESSION_PARAM in st.query_params:
+        revoke_token(st.query_params[SESSION_PARAM])
+        del st.query_params[SESSION_PARAM]
     if 'authenticated' in st.session_state:
         del st.session_state['authenticated']
     if 'username' in st.session_state:
         del st.session_state['username']
     st.success("Logout realizado com sucesso!")
-    st.experimental_rerun()
+    st.rerun()
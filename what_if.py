@@ -0,0 +1,243 @@
+"""What-if explorer over grids of answer and weight variations.
+
+The required DLT type depends only on the answers and the winning DLT of a
+type depends only on the weights, so the grid is evaluated as two small
+passes through decision_logic: one get_dlt_type_requirements call per answer
+variant, and one score_candidates call per (weight variant, type) pair spread
+over a process pool. Every cell is then a table lookup, which keeps grids of
+10^5+ cells interactive.
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from dlt_data import questions
+from decision_logic import get_dlt_type_requirements, score_candidates
+from catalog import get_catalog, use_tenant, current_tenant
+from figure_export import show_figure
+from jobs import register_job, submit_job, show_jobs_panel
+
+METRICS = ['security', 'scalability', 'energy_efficiency', 'governance']
+METRIC_LABELS = {
+    'security': 'Segurança',
+    'scalability': 'Escalabilidade',
+    'energy_efficiency': 'Eficiência',
+    'governance': 'Governança'
+}
+FACTOR_OPTIONS = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0]
+WHAT_IF_MAX_WORKERS = int(os.environ.get('WHAT_IF_MAX_WORKERS', os.cpu_count() or 1))
+
+# Winner index used for types without any candidate DLT
+NO_WINNER = -1
+
+_executor = None
+
+def get_executor():
+    """Return the process pool shared by every session of this worker."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=WHAT_IF_MAX_WORKERS)
+    return _executor
+
+def build_answer_variants(base_answers, varied_questions):
+    """Return every combination of options for varied_questions over base_answers."""
+    options = [next(q['options'] for q in questions if q['id'] == qid) for qid in varied_questions]
+    variants = []
+    for combo in itertools.product(*options):
+        answers = dict(base_answers)
+        answers.update(zip(varied_questions, combo))
+        variants.append(answers)
+    return variants
+
+def build_weight_variants(factors, metrics=METRICS):
+    """Return every combination of per-metric multipliers drawn from factors."""
+    return [dict(zip(metrics, combo)) for combo in itertools.product(factors, repeat=len(metrics))]
+
+def apply_multipliers(multipliers, type_weights=None):
+    """Scale each metric weight of every DLT type and renormalize to sum 1."""
+    type_weights = type_weights or get_catalog().dlt_type_weights
+    scaled = {}
+    for dlt_type, weights in type_weights.items():
+        raw = {m: w * multipliers.get(m, 1.0) for m, w in weights.items()}
+        total = sum(raw.values()) or 1.0
+        scaled[dlt_type] = {m: w / total for m, w in raw.items()}
+    return scaled
+
+def _evaluate_weight_chunk(start, multiplier_chunk, dlt_types, dlt_names, catalog):
+    """Worker: winner index and score per (weight variant, DLT type)."""
+    winners = np.full((len(multiplier_chunk), len(dlt_types)), NO_WINNER, dtype=np.int16)
+    scores = np.zeros((len(multiplier_chunk), len(dlt_types)))
+    for i, multipliers in enumerate(multiplier_chunk):
+        weights = apply_multipliers(multipliers, catalog.dlt_type_weights)
+        for j, dlt_type in enumerate(dlt_types):
+            candidates = score_candidates(dlt_type, weights, catalog)
+            if candidates:
+                best = max(candidates.items(), key=lambda x: x[1])
+                winners[i, j] = dlt_names.index(best[0])
+                scores[i, j] = best[1]
+    return start, winners, scores
+
+def explore_grid(answer_variants, weight_variants, chunk_size=64, max_workers=None):
+    """Evaluate the grid, yielding (col_start, winners, scores) blocks as they complete.
+
+    Each block covers weight variants col_start..col_start+n and every answer
+    variant: winners[a, w] is the index into dlt_names of the recommended DLT.
+    max_workers=0 evaluates in-process. Every block is scored against the
+    catalog version current when the call started, which workers receive.
+    """
+    catalog = get_catalog()
+    dlt_names = list(catalog.dlt_classification)
+    answer_types = [get_dlt_type_requirements(answers) for answers in answer_variants]
+    dlt_types = sorted(set(answer_types))
+    type_index = np.array([dlt_types.index(t) for t in answer_types])
+
+    chunks = [(start, weight_variants[start:start + chunk_size])
+              for start in range(0, len(weight_variants), chunk_size)]
+
+    def expand(result):
+        start, winners, scores = result
+        # (weights x types) -> (answers x weights) through each answer's type
+        return start, winners[:, type_index].T, scores[:, type_index].T
+
+    if max_workers == 0:
+        for start, chunk in chunks:
+            yield expand(_evaluate_weight_chunk(start, chunk, dlt_types, dlt_names, catalog))
+        return
+
+    executor = get_executor() if max_workers is None else ProcessPoolExecutor(max_workers=max_workers)
+    futures = [executor.submit(_evaluate_weight_chunk, start, chunk, dlt_types, dlt_names, catalog)
+               for start, chunk in chunks]
+    try:
+        for future in as_completed(futures):
+            yield expand(future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+        if executor is not _executor:
+            executor.shutdown(wait=False)
+
+def _answer_label(answers, varied_questions):
+    return ' '.join(f"{qid}={'S' if answers[qid] == 'Sim' else 'N'}" for qid in varied_questions)
+
+def _weight_label(multipliers):
+    return ' '.join(f"{METRIC_LABELS[m][:3]}×{f:g}" for m, f in multipliers.items())
+
+def create_grid_heatmap(winners, dlt_names, row_labels, col_labels):
+    """Heatmap of the winning DLT per cell; pending cells are left blank."""
+    pending = winners == NO_WINNER
+    z = np.where(pending, np.nan, winners).astype(float)
+    # DLT name per cell for the hover label; z only holds the DLT's index
+    names = np.array(list(dlt_names) + [''], dtype=object)[np.where(pending, len(dlt_names), winners)]
+    fig = go.Figure(data=go.Heatmap(
+        z=z,
+        customdata=names,
+        x=col_labels,
+        y=row_labels,
+        colorscale='Turbo',
+        zmin=0,
+        zmax=max(1, len(dlt_names) - 1),
+        colorbar=dict(tickvals=list(range(len(dlt_names))), ticktext=dlt_names),
+        hovertemplate="Respostas: %{y}<br>Pesos: %{x}<br>DLT: %{customdata}<extra></extra>"
+    ))
+    fig.update_layout(
+        title="DLT Recomendada por Cenário",
+        height=600,
+        xaxis=dict(showticklabels=len(col_labels) <= 50),
+        yaxis=dict(showticklabels=len(row_labels) <= 50)
+    )
+    return fig
+
+@register_job('what_if_grid', "Exportação de cenários")
+def export_grid_job(ctx, base_answers, varied_questions, factors, tenant=None):
+    """Job: evaluate the whole grid on tenant's catalog and return it as CSV, one row per scenario."""
+    with use_tenant(tenant):
+        return _export_grid(ctx, base_answers, varied_questions, factors)
+
+def _export_grid(ctx, base_answers, varied_questions, factors):
+    answer_variants = build_answer_variants(base_answers, varied_questions)
+    weight_variants = build_weight_variants(sorted(factors))
+    dlt_names = list(get_catalog().dlt_classification)
+    row_labels = [_answer_label(a, varied_questions) for a in answer_variants]
+    col_labels = [_weight_label(w) for w in weight_variants]
+    frames = []
+    done = 0
+    for start, winners, scores in explore_grid(answer_variants, weight_variants):
+        rows, cols = np.indices(winners.shape)
+        frames.append(pd.DataFrame({
+            'Respostas': np.array(row_labels)[rows.ravel()],
+            'Pesos': np.array(col_labels)[start + cols.ravel()],
+            'DLT': [dlt_names[i] if i != NO_WINNER else 'Nenhuma' for i in winners.ravel()],
+            'Pontuação': scores.ravel()
+        }))
+        done += winners.shape[1]
+        ctx.progress(done / len(weight_variants))
+    return pd.concat(frames).to_csv(index=False).encode('utf-8')
+
+def show_what_if_explorer():
+    """Display the what-if explorer page."""
+    st.title("Explorador de Cenários")
+    st.write("Veja como a recomendação muda ao variar respostas do questionário e pesos das métricas.")
+
+    base_answers = {q['id']: st.session_state.get('answers', {}).get(q['id'], q['options'][-1])
+                    for q in questions}
+    question_ids = [q['id'] for q in questions]
+    varied_questions = st.multiselect("Perguntas a variar", question_ids, default=question_ids)
+    factors = st.multiselect("Multiplicadores de peso por métrica", FACTOR_OPTIONS,
+                             default=[0.5, 1.0, 1.5])
+    if not factors:
+        factors = [1.0]
+
+    answer_variants = build_answer_variants(base_answers, varied_questions)
+    weight_variants = build_weight_variants(sorted(factors))
+    st.caption(f"{len(answer_variants)} variações de respostas × {len(weight_variants)} variações de pesos "
+               f"= {len(answer_variants) * len(weight_variants)} cenários")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        explore = st.button("Explorar Cenários")
+    with col2:
+        if st.button("Exportar Cenários em Segundo Plano",
+                     help="Gera o CSV de todos os cenários sem bloquear a página"):
+            try:
+                submit_job('what_if_grid', {'base_answers': base_answers, 'varied_questions': varied_questions,
+                                            'factors': factors, 'tenant': current_tenant()},
+                           st.session_state.get('username'))
+            except ValueError as e:
+                st.error(str(e))
+    show_jobs_panel(st.session_state.get('username'), kinds=['what_if_grid'],
+                    file_name=lambda job: 'cenarios.csv')
+
+    if not explore:
+        return
+
+    dlt_names = list(get_catalog().dlt_classification)
+    winners = np.full((len(answer_variants), len(weight_variants)), NO_WINNER, dtype=np.int16)
+    row_labels = [_answer_label(a, varied_questions) for a in answer_variants]
+    col_labels = [_weight_label(w) for w in weight_variants]
+
+    progress = st.progress(0.0)
+    chart = st.empty()
+    done = 0
+    last_draw = 0.0
+    for start, block, _ in explore_grid(answer_variants, weight_variants):
+        winners[:, start:start + block.shape[1]] = block
+        done += block.shape[1]
+        progress.progress(done / len(weight_variants))
+        # Redraw at most twice a second; every redraw ships the whole grid
+        if done == len(weight_variants) or time.monotonic() - last_draw > 0.5:
+            show_figure(create_grid_heatmap(winners, dlt_names, row_labels, col_labels), 'what_if_grid',
+                        container=chart, use_container_width=True)
+            last_draw = time.monotonic()
+
+    counts = pd.Series(winners.ravel()).value_counts()
+    summary = pd.DataFrame({
+        'DLT': [dlt_names[i] if i != NO_WINNER else 'Nenhuma' for i in counts.index],
+        'Cenários': counts.values,
+        'Proporção': counts.values / winners.size
+    })
+    st.subheader("Distribuição das Recomendações")
+    st.dataframe(summary)